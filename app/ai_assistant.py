@@ -3,11 +3,105 @@ Enhanced AI Assistant for Guitar Wiring with streaming, context awareness, and c
 """
 import streamlit as st
 from typing import Optional, Generator
+from urllib.parse import urlparse
+from collections import OrderedDict
+from contextlib import contextmanager
+import hashlib
 import os
+import queue
+import socket
+import threading
+import time
 import requests
 import json
 import re
 
+# How long a health-check result is reused before the sidebar probes the server again
+HEALTH_TTL_SECONDS = 30
+
+# Idle keep-alive sessions for Ollama calls. requests.Session isn't documented as thread-safe and
+# every Streamlit session runs its script in its own thread, so a call checks a Session out for its
+# whole duration (a stream holds it until the last chunk) and hands it back afterwards. Concurrent
+# calls each get their own Session; idle ones survive reruns so repeat calls reuse the socket.
+OLLAMA_IDLE_SESSIONS_MAX = 4
+_OLLAMA_SESSIONS = queue.LifoQueue(maxsize=OLLAMA_IDLE_SESSIONS_MAX)
+
+
+def _new_ollama_session() -> requests.Session:
+    session = requests.Session()
+    session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0))
+    session.headers['Connection'] = 'keep-alive'
+    return session
+
+
+@contextmanager
+def _ollama_session():
+    """Borrow an idle Ollama Session (or open a new one) for exclusive use by this thread."""
+    try:
+        session = _OLLAMA_SESSIONS.get_nowait()
+    except queue.Empty:
+        session = _new_ollama_session()
+    try:
+        yield session
+    finally:
+        try:
+            _OLLAMA_SESSIONS.put_nowait(session)
+        except queue.Full:
+            session.close()
+
+# Finished answers keyed by sha256(model + prompt); repeated identical questions are served from
+# here instead of re-running the model. Shared by all sessions of this server process.
+RESPONSE_CACHE_MAX = 128
+RESPONSE_CACHE_TTL_SECONDS = 3600
+_RESPONSE_CACHE = OrderedDict()
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+
+def _response_cache_key(model: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model}\x1f{prompt}".encode('utf-8')).hexdigest()
+
+
+def get_cached_response(model: str, prompt: str) -> Optional[str]:
+    """Return a previously generated answer for this model/prompt, or None if absent or expired."""
+    key = _response_cache_key(model, prompt)
+    with _RESPONSE_CACHE_LOCK:
+        hit = _RESPONSE_CACHE.get(key)
+        if hit is None:
+            return None
+        text, stored_at = hit
+        if time.monotonic() - stored_at > RESPONSE_CACHE_TTL_SECONDS:
+            del _RESPONSE_CACHE[key]
+            return None
+        _RESPONSE_CACHE.move_to_end(key)
+        return text
+
+
+def store_cached_response(model: str, prompt: str, text: str):
+    """Remember a finished answer, evicting the least recently used entry when full."""
+    key = _response_cache_key(model, prompt)
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE[key] = (text, time.monotonic())
+        _RESPONSE_CACHE.move_to_end(key)
+        while len(_RESPONSE_CACHE) > RESPONSE_CACHE_MAX:
+            _RESPONSE_CACHE.popitem(last=False)
+
+
+def clear_response_cache():
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE.clear()
+
+
+def _tcp_probe(url: str, timeout: float = 0.2) -> bool:
+    """Return True when something accepts TCP connections on the host/port of `url`."""
+    parsed = urlparse(url)
+    host = parsed.hostname or '127.0.0.1'
+    port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
 
 class AIAssistant:
     """Interactive AI assistant with streaming, context awareness, and chat history."""
@@ -16,6 +110,7 @@ class AIAssistant:
         self.ollama_url = os.environ.get('OLLAMA_URL', 'http://127.0.0.1:11434').rstrip('/')
         self.model = os.environ.get('OLLAMA_MODEL', 'mistral:7b')
         self.ai_available = True  # Will be set to False if connection fails
+        self.last_response_failed = False  # True when the last stream_response yielded an error/offline notice
         
         # Step guidance prompts
         self.step_guides = {
@@ -34,8 +129,11 @@ class AIAssistant:
     def stream_response(self, prompt: str, timeout: float = 30.0) -> Generator[str, None, None]:
         """Stream AI response word by word using Ollama API.
         
-        If Ollama is unavailable, falls back to static FAQ mode.
+        If Ollama is unavailable, falls back to static FAQ mode. `last_response_failed` tells the
+        caller whether the text came from the model or is a failure notice.
         """
+        self.last_response_failed = False
+        streamed = False
         url = f"{self.ollama_url}/api/generate"
         payload = {
             "model": self.model,
@@ -46,21 +144,23 @@ class AIAssistant:
         headers = {"Content-Type": "application/json"}
         
         try:
-            resp = requests.post(url, json=payload, headers=headers, timeout=timeout, stream=True)
-            resp.raise_for_status()
-            
-            for line in resp.iter_lines(decode_unicode=True):
-                if not line:
-                    continue
-                try:
-                    obj = json.loads(line)
-                    if isinstance(obj, dict) and "response" in obj:
-                        chunk = obj.get("response", "")
-                        if chunk:
-                            yield chunk
-                except json.JSONDecodeError:
-                    continue
+            with _ollama_session() as session, session.post(url, json=payload, headers=headers, timeout=timeout, stream=True) as resp:
+                resp.raise_for_status()
+
+                for line in resp.iter_lines(decode_unicode=True):
+                    if not line:
+                        continue
+                    try:
+                        obj = json.loads(line)
+                        if isinstance(obj, dict) and "response" in obj:
+                            chunk = obj.get("response", "")
+                            if chunk:
+                                streamed = True
+                                yield chunk
+                    except json.JSONDecodeError:
+                        continue
         except Exception as e:
+            self.last_response_failed = True
             # Re-check health to decide behavior. If the model endpoint is healthy,
             # ensure we still return AI-generated text by attempting a non-streaming
             # generate call as a fallback. Only when the server is truly unreachable
@@ -80,7 +180,8 @@ class AIAssistant:
                         "stream": False,
                         "max_tokens": 512,
                     }
-                    r = requests.post(f"{self.ollama_url}/api/generate", json=payload_ns, headers=headers, timeout=timeout)
+                    with _ollama_session() as session:
+                        r = session.post(f"{self.ollama_url}/api/generate", json=payload_ns, headers=headers, timeout=timeout)
                     r.raise_for_status()
                     try:
                         jr = r.json()
@@ -98,6 +199,8 @@ class AIAssistant:
                         text = r.text
 
                     if text:
+                        # A stream cut off part-way already yielded text; the answer is then incomplete
+                        self.last_response_failed = streamed
                         yield text
                         return
                     else:
@@ -122,9 +225,14 @@ class AIAssistant:
 
         Returns: {'ok': bool, 'models': list|string, 'error': str}
         """
+        # Cheap liveness probe first so an offline server doesn't cost a full HTTP timeout
+        if not _tcp_probe(self.ollama_url):
+            self.ai_available = False
+            return {'ok': False, 'models': [], 'error': f'No server listening at {self.ollama_url}'}
         try:
             url = f"{self.ollama_url}/v1/models"
-            r = requests.get(url, timeout=timeout)
+            with _ollama_session() as session:
+                r = session.get(url, timeout=timeout)
             if r.status_code == 200:
                 try:
                     j = r.json()
@@ -221,26 +329,37 @@ class AIAssistant:
         ]
 
 
+# AI session-state defaults (immutable values only; see init_ai_session_state for the chat history)
+_AI_STATE_DEFAULTS = {
+    'ai_response': "",
+    'ai_streaming': False,
+    'previous_step': 0,
+    'show_step_guidance': True,
+}
+
+
 def init_ai_session_state():
     """Initialize AI-related session state variables."""
-    if 'ai_chat_history' not in st.session_state:
-        st.session_state['ai_chat_history'] = []
-    if 'ai_response' not in st.session_state:
-        st.session_state['ai_response'] = ""
-    if 'ai_streaming' not in st.session_state:
-        st.session_state['ai_streaming'] = False
-    if 'previous_step' not in st.session_state:
-        st.session_state['previous_step'] = 0
-    if 'show_step_guidance' not in st.session_state:
-        st.session_state['show_step_guidance'] = True
+    for k, v in _AI_STATE_DEFAULTS.items():
+        st.session_state.setdefault(k, v)
+    # Each session gets its own list; a shared module-level default would leak history between users
+    st.session_state.setdefault('ai_chat_history', [])
 
 
 def render_ai_sidebar():
     """Render the AI assistant sidebar with all interactive features."""
     assistant = AIAssistant()
     init_ai_session_state()
-    # Run a quick health check so the UI accurately reports availability
-    health = assistant.check_health()
+    # Run a quick health check so the UI accurately reports availability; the result is
+    # reused for HEALTH_TTL_SECONDS so ordinary widget reruns don't hit the server.
+    now = time.monotonic()
+    cached = st.session_state.get('_ai_status')
+    if cached and now - cached[1] < HEALTH_TTL_SECONDS:
+        health = cached[0]
+        assistant.ai_available = bool(health.get('ok'))
+    else:
+        health = assistant.check_health()
+        st.session_state['_ai_status'] = (health, now)
 
     st.sidebar.markdown("---")
     st.sidebar.markdown("## 🤖 AI Assistant")
@@ -296,6 +415,8 @@ def render_ai_sidebar():
                 st.rerun()
         else:
             st.info("No chat history yet")
+        if st.button("Clear AI cache", key="clear_ai_cache"):
+            clear_response_cache()
     
     # Suggestion buttons
     st.sidebar.markdown("### Quick Questions:")
@@ -344,7 +465,7 @@ def render_ai_sidebar():
             st.sidebar.success("✅ Response received (local step guidance)!")
             # Log the interaction
             try:
-                import time, os, json
+                import os, json
                 log_path = os.path.join('app', 'ai_input_log.jsonl')
                 entry = {
                     'ts': int(time.time()),
@@ -378,10 +499,16 @@ def render_ai_sidebar():
         
         full_response = ""
         
+        cached_response = None if is_easter_egg else get_cached_response(assistant.model, response_or_prompt)
+
         if is_easter_egg:
             # Easter egg detected - display directly without streaming
             full_response = response_or_prompt
             response_placeholder.markdown(full_response)
+        elif cached_response is not None:
+            # Same question with the same context was answered already - reuse it
+            full_response = cached_response
+            response_placeholder.markdown(full_response)
         else:
             # Normal AI response - stream from Ollama
             with response_placeholder.container():
@@ -413,13 +540,17 @@ def render_ai_sidebar():
             except Exception:
                 # best-effort: ignore regeneration errors and keep original response
                 pass
+
+            # Only cache real model output, not the offline/failed-call notices
+            if assistant.ai_available and full_response.strip() and not assistant.last_response_failed:
+                store_cached_response(assistant.model, response_or_prompt, full_response)
         
         # Add AI response to history
         assistant.add_to_history("assistant", full_response)
         
         # Write interaction to log (jsonl)
         try:
-            import time, os, json
+            import os, json
             log_path = os.path.join('app', 'ai_input_log.jsonl')
             entry = {
                 'ts': int(time.time()),
@@ -1,6 +1,7 @@
 import os
 import streamlit as st
 import streamlit.components.v1 as components
+import hashlib
 import json
 import re
 try:
@@ -39,12 +40,6 @@ except Exception:
         def render_ai_sidebar():
             return
 
-# HTTP helper for local AI health check
-try:
-    import requests
-except Exception:
-    requests = None
-
 # Global color map for small UI badges (used across steps)
 GLOBAL_COLOR_HEX = {
     'Red': '#d62728',
@@ -59,110 +54,229 @@ GLOBAL_COLOR_HEX = {
 # Alias used in several helpers (kept for compatibility with earlier code)
 COLOR_HEX = GLOBAL_COLOR_HEX
 
-def _render_color_badges(colors: list) -> str:
-    """Return HTML for inline badges matching the given color names."""
-    if not colors:
-        return ''
-    parts = []
-    for c in colors:
-        hexcol = GLOBAL_COLOR_HEX.get(c, '#cccccc')
-        # Use dark text on very light fills (white/yellow), otherwise white text
-        text_color = '#111111' if hexcol.lower() in ('#ffffff', '#ffbf00') else '#ffffff'
-        # Add a subtle border for white so it is visible on light backgrounds
-        border_css = 'border:1px solid #ddd;' if hexcol.lower() == '#ffffff' else ''
-        # Show the color name in uppercase for better visual matching
-        parts.append(
-            f"<span style='display:inline-block;margin-right:8px;padding:6px 12px;border-radius:6px;background:{hexcol};color:{text_color};font-family:sans-serif;font-size:13px;font-weight:600;{border_css}'>" +
-            f"{c.upper()}</span>"
+# Conductor colours offered in Step 2 (built once rather than inside the step body)
+COLOR_OPTIONS = ['Red', 'White', 'Green', 'Black', 'Yellow', 'Blue', 'Bare']
+_COLOR_SET = frozenset(COLOR_OPTIONS)
+
+# Overlay contrast: COLOR_HEX values are lowercase constants, so the per-row checks are plain lookups.
+LIGHT_FILLS = frozenset({'#ffffff', '#ffbf00'})
+DARK_FILLS = frozenset({'#111111', '#000000'})
+TEXT_ON_FILL = {h: '#111111' if h in LIGHT_FILLS else '#ffffff' for h in COLOR_HEX.values()}
+
+
+def _none_if_dash(val):
+    """Normalize probe->wire selections: the selectboxes include a '--' placeholder."""
+    return None if (val is None or (isinstance(val, str) and val.strip() == '--')) else val
+
+
+# (map name, colour-pair key, probe/swap key prefix) for the four coils
+_COIL_INPUTS = (
+    ('neck_upper', 'neck_north_colors', 'n_up'),
+    ('neck_lower', 'neck_south_colors', 'n_lo'),
+    ('bridge_upper', 'bridge_north_colors', 'b_up'),
+    ('bridge_lower', 'bridge_south_colors', 'b_lo'),
+)
+
+
+def _infer_coil_maps(ss) -> dict:
+    """Infer START/FINISH for all four coils in one pass, keyed by map name.
+
+    `ss` is a plain-dict snapshot of the session keys involved, so each lookup is a dict read. The
+    inference itself is memoised inside app/wiring.py, which (unlike this script) persists across
+    reruns.
+    """
+    return {
+        name: infer_start_finish_from_probes(
+            ss.get(colors_key) or (),
+            _none_if_dash(ss.get(f'{prefix}_probe_red_wire')),
+            _none_if_dash(ss.get(f'{prefix}_probe_black_wire')),
+            ss.get(f'{prefix}_probe'),
+            ss.get(f'{prefix}_swap', False),
         )
-    return ''.join(parts)
+        for name, colors_key, prefix in _COIL_INPUTS
+    }
+
+
+# Badge markup shared by every colour; only the fill, text colour, border and label vary.
+_BADGE_TMPL = (
+    "<span style='display:inline-block;margin-right:8px;padding:6px 12px;border-radius:6px;"
+    "background:{hex};color:{tc};font-family:sans-serif;font-size:13px;font-weight:600;{border}'>"
+    "{label}</span>"
+)
+
+
+def _badge_html(color_name: str) -> str:
+    hexcol = GLOBAL_COLOR_HEX.get(color_name, '#cccccc')
+    return _BADGE_TMPL.format_map({
+        # Dark text on very light fills (white/yellow), otherwise white text
+        'hex': hexcol, 'tc': TEXT_ON_FILL.get(hexcol, '#ffffff'),
+        # Subtle border for white so it is visible on light backgrounds
+        'border': 'border:1px solid #ddd;' if hexcol == '#ffffff' else '',
+        # Colour name in uppercase for better visual matching
+        'label': color_name.upper(),
+    })
+
+
+# Finished badge for every palette colour; names outside the palette are built on demand
+_BADGE_HTML = {c: _badge_html(c) for c in GLOBAL_COLOR_HEX}
+
+
+# Overlay elements. The browser ignores whitespace between elements, so pieces are joined bare.
+# Font settings are inherited from the <svg> root, and the four rows' connectors, balls, ball
+# initials and labels are each wrapped in a <g> that carries their shared attributes. The lead stub
+# and visible connector abut with butt caps, so they are drawn as one line.
+_OVERLAY_LINE_TMPL = '<line x1="0" y1="{y}" x2="{x2}" y2="{y}" stroke="{stroke}"/>'
+_OVERLAY_BALL_TMPL = '<circle cx="{cx}" cy="{y}" r="{r}" fill="{fill}"/>'
+_OVERLAY_INITIAL_TMPL = '<text x="{cx}" y="{y}" fill="{fill}">{t}</text>'
+_OVERLAY_LABEL_TMPL = '<text x="{x}" y="{y}">{label}</text>'
+_OVERLAY_ROWS_TMPL = (
+    '<g stroke-width="{stroke_w}" stroke-opacity="0.75">{lines}</g>'
+    '<g stroke="#222">{balls}</g>'
+    '<g text-anchor="middle" dominant-baseline="middle">{initials}</g>'
+    '<g fill="#fff">{labels}</g>'
+)
+_OVERLAY_SERIES_TMPL = ''.join((
+    '<line x1="{x}" y1="{y1}" x2="{x}" y2="{y2}" stroke="#fff" stroke-width="2" stroke-linecap="round"/>',
+    '<text x="{text_x}" y="{text_y}" fill="#fff">Series</text>',
+))
+
+# Overlay geometry is fixed, so the x positions are worked out once here. The connector runs from a
+# left anchor towards the ball's default anchor, shortened to _SVG_LINE_FRACTION of that length,
+# and the ball sits just past the visible line end.
+_SVG_R = 12
+_SVG_LEFT_X = 18
+_SVG_DEFAULT_CIRCLE_X = 140
+_SVG_LINE_FRACTION = 0.6
+_SVG_LINE_END = _SVG_LEFT_X + int((_SVG_DEFAULT_CIRCLE_X - _SVG_R - 6 - _SVG_LEFT_X) * _SVG_LINE_FRACTION)
+_SVG_CIRCLE_X = _SVG_LINE_END + _SVG_R + 6
+_SVG_CONNECTOR_X = _SVG_CIRCLE_X
+_SVG_LABEL_X = _SVG_CIRCLE_X + _SVG_R + 10
+# Series label sits left of the connector so it doesn't overlap right-side text
+_SVG_SERIES_X = max(_SVG_LEFT_X + 6, _SVG_CONNECTOR_X - (_SVG_R + 64))
+# Row y positions (CoilA START, CoilA END, CoilB END, CoilB START). The sidebar rows sit higher to
+# line up with the wires in its image; Step 6 spreads the two coils further apart.
+_SIDEBAR_ROW_YS = (18, 58, 98, 138)
+_PREVIEW_ROW_YS = (36, 76, 156, 196)
+
+# Fixed overlay <svg> opening tag (260x200 box) and the preview container shared by the sidebar and
+# Step 6: the pickup SVG inline, with the overlay absolutely positioned on its right-hand side.
+_OVERLAY_SVG_OPEN = (
+    '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 260 200" preserveAspectRatio="xMinYMin meet" '
+    'width="220" height="200" font-family="sans-serif" font-size="12">'
+)
+_PREVIEW_HTML_TMPL = (
+    '<div style="position:relative; width:100%; max-width:560px;">'
+    '<div style="position:relative; z-index:1;">{svg}</div>'
+    '{overlay}'
+    '</div>'
+)
+_PREVIEW_OVERLAY_TMPL = '<div style="position:absolute; right:8px; top:8px; z-index:2; pointer-events:none;">{overlay}</div>'
 
 
-def _collect_streamed_json_text(resp):
-    """Collect streamed JSON objects from a requests Response and return concatenated 'response' fields.
+def _overlay_rows(rows, stroke_w, dark_line) -> str:
+    """Return the grouped overlay markup for `rows` of (wire colour name, y, label).
 
-    Handles newline-delimited JSON chunks and simple concatenated JSON objects. Returns empty
-    string on failure.
+    Unknown colours get a grey '?' ball. Connectors match their ball, except white/yellow get a light
+    line and black fills get `dark_line`; ball initials are dark on white/yellow.
     """
-    parts = []
-    try:
-        # Prefer iter_lines for streamed responses
-        for raw in resp.iter_lines(decode_unicode=True):
-            if not raw:
-                continue
-            s = raw.strip()
-            if not s:
-                continue
-            # Try to parse the entire line as JSON first
-            try:
-                obj = json.loads(s)
-            except Exception:
-                # Fallback: extract any JSON object substrings on the line
-                matches = re.findall(r'\{.*?\}', s)
-                obj = None
-                for m in matches:
-                    try:
-                        o = json.loads(m)
-                        if isinstance(o, dict) and 'response' in o:
-                            parts.append(o.get('response') or '')
-                    except Exception:
-                        continue
-                # continue to next line
-                continue
-
-            if isinstance(obj, dict):
-                # collect 'response' if present
-                if 'response' in obj and isinstance(obj.get('response'), str):
-                    parts.append(obj.get('response'))
-                elif 'text' in obj and isinstance(obj.get('text'), str):
-                    parts.append(obj.get('text'))
-                # stop when done==true
-                if obj.get('done') is True:
-                    break
-            else:
-                parts.append(str(obj))
-        return ''.join(parts).strip()
-    except Exception:
+    lines, balls, initials, labels = [], [], [], []
+    for colour, y, label in rows:
+        fill = COLOR_HEX.get(colour, '#cccccc') if colour else '#cccccc'
+        if fill in LIGHT_FILLS:
+            line_color = '#cccccc'
+        elif fill in DARK_FILLS:
+            line_color = dark_line
+        else:
+            line_color = fill
+        lines.append(_OVERLAY_LINE_TMPL.format(y=y, x2=_SVG_LINE_END, stroke=line_color))
+        balls.append(_OVERLAY_BALL_TMPL.format(cx=_SVG_CIRCLE_X, y=y, r=_SVG_R, fill=fill))
+        initials.append(_OVERLAY_INITIAL_TMPL.format(
+            cx=_SVG_CIRCLE_X, y=y, fill=TEXT_ON_FILL.get(fill, '#ffffff'), t=colour[0].upper() if colour else '?',
+        ))
+        labels.append(_OVERLAY_LABEL_TMPL.format(x=_SVG_LABEL_X, y=y + 4, label=label))
+    return _OVERLAY_ROWS_TMPL.format(
+        stroke_w=stroke_w, lines=''.join(lines), balls=''.join(balls),
+        initials=''.join(initials), labels=''.join(labels),
+    )
+
+
+def _overlay_svg(upper: tuple, lower: tuple, top_is_north: bool, row_ys: tuple, stroke_w, dark_line) -> str:
+    """Return the overlay <svg> for one pickup; `upper`/`lower` are (start, finish) colour tuples.
+
+    Rows run top->bottom CoilA START, CoilA END, CoilB END, CoilB START at `row_ys` (CoilA is the
+    upper coil), with a series connector between the two middle balls.
+    """
+    coilA_pol = 'North' if top_is_north else 'South'
+    coilB_pol = 'South' if top_is_north else 'North'
+    y_a1, y_a2, y_b1, y_b2 = row_ys
+    parts = [
+        _OVERLAY_SVG_OPEN,
+        _overlay_rows((
+            (upper[0], y_a1, f'{coilA_pol} START +'),
+            (upper[1], y_a2, f'{coilA_pol} END -'),
+            (lower[1], y_b1, f'{coilB_pol} END -'),
+            (lower[0], y_b2, f'{coilB_pol} START +'),
+        ), stroke_w, dark_line),
+    ]
+    # Series connector, shortened a bit so it doesn't overlap nearby labels
+    gap = max(6, int((y_b1 - y_a2) * 0.18))
+    y1s = y_a2 + gap
+    y2s = y_b1 - gap
+    mid_y = int((y1s + y2s) / 2)
+    parts.append(_OVERLAY_SERIES_TMPL.format(x=_SVG_CONNECTOR_X, y1=y1s, y2=y2s, text_x=_SVG_SERIES_X, text_y=mid_y + 4))
+    parts.append('</svg>')
+    return ''.join(parts)
+
+def _render_color_badges(colors: list) -> str:
+    """Return HTML for inline badges matching the given color names."""
+    if not colors:
         return ''
+    return ''.join(_BADGE_HTML.get(c) or _badge_html(c) for c in colors)
+
 
 st.set_page_config(page_title='Humbucker Solver', layout='wide')
 
-if 'step' not in st.session_state:
-    st.session_state['step'] = 1
-# Ensure orientation keys persist and have sensible defaults so changing other widgets
-# doesn't accidentally reset pickup orientation.
-if 'neck_orientation' not in st.session_state:
-    st.session_state['neck_orientation'] = 'Top = NORTH / Bottom = SOUTH'
-if 'bridge_orientation' not in st.session_state:
-    st.session_state['bridge_orientation'] = 'Top = NORTH / Bottom = SOUTH'
-# Explicit boolean flags (more robust than parsing strings) to choose which image to show
-if 'neck_is_north_up' not in st.session_state:
-    st.session_state['neck_is_north_up'] = True
-if 'bridge_is_north_up' not in st.session_state:
-    st.session_state['bridge_is_north_up'] = True
-if 'neck_img_choice' not in st.session_state:
-    st.session_state['neck_img_choice'] = 'north'
-if 'bridge_img_choice' not in st.session_state:
-    st.session_state['bridge_img_choice'] = 'north'
-
-# Handlers to update image-choice when toggles change (prevents accidental overrides elsewhere)
-def _on_neck_toggle():
-    st.session_state['neck_img_choice'] = 'north' if st.session_state.get('neck_is_north_up', True) else 'south'
-    st.session_state['neck_orientation'] = 'Top = NORTH / Bottom = SOUTH' if st.session_state.get('neck_is_north_up', True) else 'Top = SOUTH / Bottom = NORTH'
-
-def _on_bridge_toggle():
-    st.session_state['bridge_img_choice'] = 'north' if st.session_state.get('bridge_is_north_up', True) else 'south'
-    st.session_state['bridge_orientation'] = 'Top = NORTH / Bottom = SOUTH' if st.session_state.get('bridge_is_north_up', True) else 'Top = Screw (S) / Bottom = NORTH'
+# Session-state defaults, applied once per rerun with setdefault so existing values are kept.
+_DEFAULTS = {
+    'step': 1,
+    # Ensure orientation keys persist and have sensible defaults so changing other widgets
+    # doesn't accidentally reset pickup orientation.
+    'neck_orientation': 'Top = NORTH / Bottom = SOUTH',
+    'bridge_orientation': 'Top = NORTH / Bottom = SOUTH',
+    # Explicit boolean flags (more robust than parsing strings) to choose which image to show
+    'neck_is_north_up': True,
+    'bridge_is_north_up': True,
+    'neck_img_choice': 'north',
+    'bridge_img_choice': 'north',
+    # Per-selector expander state flags (used to open/close edit expanders programmatically)
+    'edit_neck_north_expanded': False,
+    'edit_neck_south_expanded': False,
+    'edit_bridge_north_expanded': False,
+    'edit_bridge_south_expanded': False,
+    # Expander state flags so we can programmatically close them when the user
+    # has completed a valid selection (exactly 2 colors). Keys are persisted so
+    # the UI behaves consistently across reruns/backups.
+    'exp_neck_north': False,
+    'exp_neck_south': False,
+    'exp_bridge_north': False,
+    'exp_bridge_south': False,
+    # Compact UI toggle: reduces padding, font-size and image heights to show more content
+    'compact_ui': False,
+}
+for _k, _v in _DEFAULTS.items():
+    st.session_state.setdefault(_k, _v)
+
+# Handler to update image-choice when a pickup's toggle changes (prevents accidental overrides elsewhere).
+# Registered per pickup via `on_change=_on_orientation_toggle, args=(which,)`.
+def _on_orientation_toggle(which: str):
+    north_up = st.session_state.get(f'{which}_is_north_up', True)
+    st.session_state[f'{which}_img_choice'] = 'north' if north_up else 'south'
+    st.session_state[f'{which}_orientation'] = 'Top = Slug (N) / Bottom = Screw (S)' if north_up else 'Top = Screw (S) / Bottom = Slug (N)'
 
 # We use native Streamlit expanders (collapsed by default) to edit color selections.
 # This avoids fragile widget-key handling and ensures selectors are visible only
 # when the user explicitly opens the expander.
 
-# Per-selector expander state flags (used to open/close edit expanders programmatically)
-for _flag in ('edit_neck_north_expanded', 'edit_neck_south_expanded', 'edit_bridge_north_expanded', 'edit_bridge_south_expanded'):
-    if _flag not in st.session_state:
-        st.session_state[_flag] = False
-
 def _open_edit(flag_name: str):
     try:
         st.session_state[flag_name] = True
@@ -184,13 +298,6 @@ def _on_multiselect_changed(which_key: str, flag_name: str):
         except Exception:
             pass
 
-# Expander state flags so we can programmatically close them when the user
-# has completed a valid selection (exactly 2 colors). Keys are persisted so
-# the UI behaves consistently across reruns/backups.
-for _ek in ('exp_neck_north', 'exp_neck_south', 'exp_bridge_north', 'exp_bridge_south'):
-    if _ek not in st.session_state:
-        st.session_state[_ek] = False
-
 # (Removed swap helper at user's request)
 
 # Title and intro moved to Step 1 (Welcome) so other steps stay compact
@@ -228,10 +335,11 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# Make inline SVG labels/text visible on dark theme (white)
-st.markdown(
-    """
+# App-wide CSS, sent as one element per run. (It has to be re-emitted on every rerun: Streamlit drops
+# elements a run doesn't produce, so a once-per-session guard would remove the styles.)
+_BASE_CSS = """
     <style>
+    /* Make inline SVG labels/text visible on dark theme (white) */
     svg text { fill: white !important; }
     svg { color: white !important; }
     /* Prevent button labels from wrapping and give buttons a sensible min-width */
@@ -240,10 +348,12 @@ st.markdown(
         min-width: 120px;
         padding: 6px 12px;
     }
+    /* Widen the sidebar so inline SVG previews have enough room */
+    [data-testid="stSidebar"] {width: 460px;}
+    @media (max-width: 991px) { [data-testid="stSidebar"] {width: 100% !important;} }
     </style>
-    """,
-    unsafe_allow_html=True,
-)
+    """
+st.markdown(_BASE_CSS, unsafe_allow_html=True)
 
 
 # Persistent preview in the sidebar: pickup image + current top/bottom mapping + small SVG
@@ -252,7 +362,21 @@ def _map_top_bottom_from_choice(choice: str):
         return {'top': 'Slug (N)', 'bottom': 'Screw (S)'}
     return {'top': 'Screw (S)', 'bottom': 'Slug (N)'}
 
-# determine image path (fall back to repo root image if available)
+# Locate a bundled pickup image by base name. The bundled files don't change while the app runs,
+# so the stat probes are cached across reruns instead of repeated for every preview.
+@st.cache_data(show_spinner=False)
+def _find_candidate(base_name):
+    exts = ['.svg', '.png', '.jpg', '.jpeg']
+    places = [os.path.join('app', 'static'), os.path.join('app'), os.path.join('.')]
+    for p in places:
+        for e in exts:
+            cand = os.path.join(p, base_name + e)
+            if os.path.exists(cand):
+                return cand
+    return None
+
+# determine image path (fall back to repo root image if available); cached like _find_candidate
+@st.cache_data(show_spinner=False)
 def _pickup_image_path():
     # look for humbucker images inside the app package (avoid repo-root screenshots)
     candidates = [
@@ -265,19 +389,63 @@ def _pickup_image_path():
             return c
     return None
 
+# Session-state keys read by the sidebar's _render_image for both pickups.
+_RENDER_KEYS = (
+    'neck_north_colors', 'neck_south_colors', 'bridge_north_colors', 'bridge_south_colors',
+    'n_up_probe_red_wire', 'n_up_probe_black_wire', 'n_up_probe', 'n_up_swap',
+    'n_lo_probe_red_wire', 'n_lo_probe_black_wire', 'n_lo_probe', 'n_lo_swap',
+    'b_up_probe_red_wire', 'b_up_probe_black_wire', 'b_up_probe', 'b_up_swap',
+    'b_lo_probe_red_wire', 'b_lo_probe_black_wire', 'b_lo_probe', 'b_lo_swap',
+    'neck_is_north_up', 'bridge_is_north_up',
+)
+
+# Inputs from earlier steps that Step 6 reads. Its own widgets (wiring choices, pickup connection)
+# and 'analysis' are read live because they change during the Step 6 run itself.
+_STEP6_KEYS = _RENDER_KEYS + ('n_up', 'n_lo', 'b_up', 'b_lo', 'bare')
+
+
+@st.cache_data(show_spinner=False)
+def _load_svg_text(path: str, mtime: float) -> str:
+    """Return the text of the SVG at `path`; `mtime` is only part of the cache key, so edits are picked up."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _load_tinted_svg(img_path: str, primary_hex) -> str:
+    """Return the SVG markup at `img_path`, with the bundled default red swapped for `primary_hex`."""
+    svg_html = _load_svg_text(img_path, os.path.getmtime(img_path))
+    if primary_hex:
+        # Replace the default red used in the bundled SVG with the chosen colour.
+        svg_html = svg_html.replace('#d62728', primary_hex)
+    return svg_html
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _composed_pickup_html(img_path: str, primary_hex, upper: tuple, lower: tuple, top_is_north: bool) -> str:
+    """Return the sidebar preview HTML: the pickup SVG with the coloured wire-end overlay on top.
+
+    Every value `_render_image` reads from session state is passed in (`upper`/`lower` are
+    (start, finish) colour tuples), so the SVG read, tint and overlay build only run again
+    when one of them changes.
+    """
+    svg_html = _load_tinted_svg(img_path, primary_hex)
+
+    # Nothing inferred yet (no probes entered): skip the placeholder overlay entirely
+    if not any(upper) and not any(lower):
+        return _PREVIEW_HTML_TMPL.format(svg=svg_html, overlay='')
+
+    # Overlay SVG that will sit on the right side of the image; thick connectors, and black fills
+    # get a light line on the dark sidebar
+    overlay_html = _overlay_svg(upper, lower, top_is_north, _SIDEBAR_ROW_YS, 5, '#cccccc')
+
+    # Compose container HTML: inline original SVG then absolutely positioned overlay
+    return _PREVIEW_HTML_TMPL.format(svg=svg_html, overlay=_PREVIEW_OVERLAY_TMPL.format(overlay=overlay_html))
+
+
 img_path = _pickup_image_path()
 with st.sidebar:
     st.header('Pickup Preview')
-    # increase sidebar width so inline SVG previews have enough room
-    st.markdown(
-        """
-        <style>
-        [data-testid="stSidebar"] {width: 460px;}
-        @media (max-width: 991px) { [data-testid="stSidebar"] {width: 100% !important;} }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
+    # (sidebar width comes from _BASE_CSS)
     # show current mapping labels (use session state defaults if not set)
     neck_choice = st.session_state.get('neck_orientation', 'Top = Slug (N) / Bottom = Screw (S)')
     bridge_choice = st.session_state.get('bridge_orientation', 'Top = Slug (N) / Bottom = Screw (S)')
@@ -286,16 +454,6 @@ with st.sidebar:
     if img_path:
         # The user provides two images in the repo: humbuckerNORTH.* and humbuckerSOUTH.*
         # Show the correct image for each pickup depending on whether the pickup is North-up or South-up.
-        def _find_candidate(base_name):
-            exts = ['.svg', '.png', '.jpg', '.jpeg']
-            places = [os.path.join('app', 'static'), os.path.join('app'), os.path.join('.')]
-            for p in places:
-                for e in exts:
-                    cand = os.path.join(p, base_name + e)
-                    if os.path.exists(cand):
-                        return cand
-            return None
-
         north_img = _find_candidate('humbuckerNORTH')
         south_img = _find_candidate('humbuckerSOUTH')
 
@@ -308,182 +466,30 @@ with st.sidebar:
             if not path:
                 st.info('Image not found')
                 return
-            if path.lower().endswith('.svg'):
+            if os.path.splitext(path)[1].lower() == '.svg':
+                # Snapshot the keys read below once instead of going through the session proxy per lookup
+                ss = {k: st.session_state[k] for k in _RENDER_KEYS if k in st.session_state}
+                # Determine a primary colour from session state for this pickup (used to tint the SVG)
+                primary_name = (ss.get(f'{which}_north_colors') or [None])[0]
+                primary_hex = COLOR_HEX.get(primary_name)
+
+                # Inferred mapping for this pickup's coils decides the ball colours
+                maps = _infer_coil_maps(ss)
+                upper_map = maps[f'{which}_upper']
+                lower_map = maps[f'{which}_lower']
+                top_is_north = ss.get(f'{which}_is_north_up', True)
+
                 try:
-                    with open(path, 'r', encoding='utf-8') as f:
-                        svg_html = f.read()
-                    # Attempt to tint the pickup SVG to match the user's selected top-coil colour.
-                    try:
-                        # Determine a primary colour from session state for this pickup
-                        if which == 'neck':
-                            primary_name = (st.session_state.get('neck_north_colors', []) or [None])[0]
-                        else:
-                            primary_name = (st.session_state.get('bridge_north_colors', []) or [None])[0]
-                        primary_hex = COLOR_HEX.get(primary_name)
-                        if primary_hex:
-                            # Replace the default red used in the bundled SVG with the chosen colour.
-                            svg_html = svg_html.replace('#d62728', primary_hex)
-                    except Exception:
-                        pass
-
-                    # Compute inferred mapping for this pickup to decide ball colours
-                    def _none_if_dash(val):
-                        return None if (val is None or (isinstance(val, str) and val.strip() == '--')) else val
-
-                    if which == 'neck':
-                        upper_map = infer_start_finish_from_probes(
-                            st.session_state.get('neck_north_colors', []),
-                            _none_if_dash(st.session_state.get('n_up_probe_red_wire')),
-                            _none_if_dash(st.session_state.get('n_up_probe_black_wire')),
-                            st.session_state.get('n_up_probe'),
-                            st.session_state.get('n_up_swap', False)
-                        )
-                        lower_map = infer_start_finish_from_probes(
-                            st.session_state.get('neck_south_colors', []),
-                            _none_if_dash(st.session_state.get('n_lo_probe_red_wire')),
-                            _none_if_dash(st.session_state.get('n_lo_probe_black_wire')),
-                            st.session_state.get('n_lo_probe'),
-                            st.session_state.get('n_lo_swap', False)
-                        )
-                    else:
-                        upper_map = infer_start_finish_from_probes(
-                            st.session_state.get('bridge_north_colors', []),
-                            _none_if_dash(st.session_state.get('b_up_probe_red_wire')),
-                            _none_if_dash(st.session_state.get('b_up_probe_black_wire')),
-                            st.session_state.get('b_up_probe'),
-                            st.session_state.get('b_up_swap', False)
-                        )
-                        lower_map = infer_start_finish_from_probes(
-                            st.session_state.get('bridge_south_colors', []),
-                            _none_if_dash(st.session_state.get('b_lo_probe_red_wire')),
-                            _none_if_dash(st.session_state.get('b_lo_probe_black_wire')),
-                            st.session_state.get('b_lo_probe'),
-                            st.session_state.get('b_lo_swap', False)
-                        )
-
-                    # map colour names to hex
-                    COLOR_HEX = {
-                        'Red': '#d62728',
-                        'White': '#ffffff',
-                        'Green': '#2ca02c',
-                        'Black': '#111111',
-                        'Yellow': '#ffbf00',
-                        'Blue': '#1f77b4',
-                        'Bare': '#888888'
-                    }
-
-                    # Build overlay SVG that will sit on the right side of the image
-                    # Use percentage positioning so it scales with the image container
-                    # Determine coil polarity labels dynamically from session state
-                    if which == 'neck':
-                        top_is_north = st.session_state.get('neck_is_north_up', True)
-                    else:
-                        top_is_north = st.session_state.get('bridge_is_north_up', True)
-                    # Use magnetic polarity names 'North' / 'South' for overlay labels
-                    coilA_pol = 'North' if top_is_north else 'South'
-                    coilB_pol = 'South' if top_is_north else 'North'
-
-                    def colour_svg_overlay(upper, lower):
-                        # Define CoilA = upper, CoilB = lower
-                        # Desired visual order (top->bottom): CoilA START, CoilA END, CoilB END, CoilB START
-                        vals = [upper.get('start'), upper.get('finish'), lower.get('finish'), lower.get('start')]
-                        # default to grey if unknown
-                        fills = [COLOR_HEX.get(v, '#cccccc') if v else '#cccccc' for v in vals]
-                        texts = [v[0].upper() if v else '?' for v in vals]
-                        # overlay SVG sized to 260x200 box
-                        parts = [f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 260 200" preserveAspectRatio="xMinYMin meet" width="220" height="200">']
-                        # Group A positions (CoilA Start, CoilA End)
-                        # We'll draw the line from a left anchor to a right anchor where the coloured ball sits.
-                        r = 12
-                        # move anchors left so balls sit closer to the pickup wires
-                        left_x = 18
-                        # default right-side anchor for the ball (used to compute full line end)
-                        default_circle_x = 140
-                        # visible fraction of the full connector line (0..1)
-                        line_fraction = 0.6
-                        # vertical offset for polarity text (Start/End) relative to the ball radius
-                        pol_text_offset = 8
-                        pol_font_size = 10
-                        # raise the circles a bit so they sit on top of the wires visually
-                        y_a1 = 18
-                        y_a2 = 58
-                        # Group B positions (increased space between CoilA and CoilB)
-                        y_b1 = 98
-                        y_b2 = 138
-                        y_positions = [y_a1, y_a2, y_b1, y_b2]
-                        labels = [
-                            f'{coilA_pol} START +',
-                            f'{coilA_pol} END -',
-                            f'{coilB_pol} END -',
-                            f'{coilB_pol} START +',
-                        ]
-                        for i, (f, t, y) in enumerate(zip(fills, texts, y_positions)):
-                            # colour the connector line to match the dot; use a neutral fallback for white
-                            try:
-                                fl = f.lower()
-                                # Use a light connector for white/yellow and for very dark fills (black)
-                                if fl in ('#ffffff', '#ffbf00'):
-                                    line_color = '#cccccc'
-                                elif fl in ('#111111', '#000000'):
-                                    line_color = '#cccccc'
-                                else:
-                                    line_color = f
-                            except Exception:
-                                line_color = '#cccccc'
-                            # draw the connector line from left anchor to a shortened visible end
-                            # compute the full end (just left of the ball) and then shorten by `line_fraction`
-                            line_end_full = default_circle_x - r - 6
-                            line_end = left_x + int((line_end_full - left_x) * line_fraction)
-                            # short stub from left edge to the left anchor so it visually connects to the pickup
-                            parts.append(f'<line x1="0" y1="{y}" x2="{left_x}" y2="{y}" stroke="{line_color}" stroke-width="5" stroke-opacity="0.75" />')
-                            parts.append(f'<line x1="{left_x}" y1="{y}" x2="{line_end}" y2="{y}" stroke="{line_color}" stroke-width="5" stroke-opacity="0.75" />')
-                            # place the coloured ball just to the right of the visible line end so it moves with it
-                            circle_x = line_end + r + 6
-                            # draw a small polarity label above the line (Start / End)
-                            polarity_word = 'Start' if 'start' in labels[i].lower() else 'End'
-                            # choose polarity text color for contrast against background
-                            pol_text_fill = '#ffffff' if f.lower() not in ('#ffffff', '#ffbf00') else "#FFFFFF"
-                            # small polarity labels removed (keep descriptive labels on the right)
-                            # draw the coloured ball at the right end of the visible connector (it follows the line)
-                            parts.append(f'<circle cx="{circle_x}" cy="{y}" r="{r}" fill="{f}" stroke="#222" stroke-width="1" />')
-                            # choose text color for contrast inside the ball (dark on white/yellow)
-                            text_fill = '#111111' if f.lower() in ('#ffffff', '#ffbf00') else '#ffffff'
-                            parts.append(f'<text x="{circle_x}" y="{y}" text-anchor="middle" dominant-baseline="middle" font-family="sans-serif" font-size="12" fill="{text_fill}">{t}</text>')
-                            # right-side label
-                            parts.append(f'<text x="{circle_x + r + 10}" y="{y+4}" font-family="sans-serif" font-size="12" fill="#ffffff">{labels[i]}</text>')
-                        # Draw a visible connector between the two middle circles (series link)
-                        try:
-                            # compute the shared circle x coordinate (same for all entries)
-                            line_end_full = default_circle_x - r - 6
-                            line_end = left_x + int((line_end_full - left_x) * line_fraction)
-                            connector_x = line_end + r + 6
-                            y1 = y_positions[1]
-                            y2 = y_positions[2]
-                            # draw a slightly thinner connector but shorten it a bit so it doesn't overlap nearby labels
-                            gap = max(6, int((y2 - y1) * 0.18))
-                            y1s = y1 + gap
-                            y2s = y2 - gap
-                            parts.append(f'<line x1="{connector_x}" y1="{y1s}" x2="{connector_x}" y2="{y2s}" stroke="#ffffff" stroke-width="2" stroke-linecap="round" />')
-                            mid_y = int((y1s + y2s) / 2)
-                            # place the Series label to the left of the connector so it doesn't overlap right-side text
-                            series_x = max(left_x + 6, connector_x - (r + 64))
-                            parts.append(f'<text x="{series_x}" y="{mid_y + 4}" font-family="sans-serif" font-size="12" fill="#ffffff">Series</text>')
-                        except Exception:
-                            pass
-                        parts.append('</svg>')
-                        return '\n'.join(parts)
-
-                    overlay_html = colour_svg_overlay(upper_map, lower_map)
-
-                    # Compose container HTML: inline original SVG then absolutely positioned overlay
-                    html = f"""
-                    <div style="position:relative; width:100%; max-width:560px;">
-                      <div style="position:relative; z-index:1;">{svg_html}</div>
-                      <div style="position:absolute; right:8px; top:8px; z-index:2; pointer-events:none;">{overlay_html}</div>
-                    </div>
-                    """
+                    html = _composed_pickup_html(
+                        path,
+                        primary_hex,
+                        (upper_map.get('start'), upper_map.get('finish')),
+                        (lower_map.get('start'), lower_map.get('finish')),
+                        bool(top_is_north),
+                    )
                     components.html(html, height=height)
-                except Exception:
+                except (OSError, ValueError) as e:
+                    st.warning(f'Could not render {os.path.basename(path)} ({e}); showing the plain image.')
                     st.image(path, use_column_width=True)
             else:
                 st.image(path, use_column_width=True)
@@ -503,89 +509,26 @@ with st.sidebar:
 
     # (Intentionally left minimal) — pickup images shown above.
 
-# Sidebar AI helper — small keyword-driven knowledge base for soldering and hum-cancelling
+# Sidebar AI helper section; the assistant itself is rendered by render_ai_sidebar() below
 st.sidebar.header('AI helper (soldering & hum-cancelling)')
 
-# Define FAQ knowledge base and helper function before using them
-FAQ_KB = {
-    'soldering_tools': (
-        '**Soldering — Tools & safety**\n'
-        '- Use a temperature-controlled iron (350–380°C / 660–715°F for electronics).\n'
-        '- Use rosin-core 60/40 or 63/37 solder for electronics; 0.7–1.0 mm diameter is convenient.\n'
-        '- Work in a well-ventilated area and wear eye protection.\n'
-        '- Keep tip clean with a damp sponge and tin the tip before and after use.\n'
-        '- Pre-tin wires and pads: heat the part, then apply solder to make a small shiny cone — then join.\n'
-    ),
-    'soldering_steps': (
-        '**Soldering — Basic steps**\n'
-        '1) Strip ~3–6 mm of insulation.\n'
-        '2) Twist stranded wire or tin it lightly.\n'
-        '3) Heat the joint (pad or lug) with the iron, apply solder to the joint (not directly to the iron).\n'
-        '4) Withdraw solder, then iron, and let the joint cool without moving.\n'
-        '5) Inspect for a smooth, shiny, concave joint ("volcano").\n'
-    ),
-    'hum_cancelling_overview': (
-        '**Hum-cancelling — Overview**\n'
-        '- Humbuckers cancel mains hum by combining two coils with opposite magnetic polarity and opposite electrical phase.\n'
-        '- To cancel hum, coils must be reverse-wound *and* reverse-polarity (RWRP).\n'
-        '- If one coil is reversed only electrically (phase) but not magnetically, cancellation fails.\n'
-    ),
-    'hum_cancelling_when_wiring': (
-        '**Wiring tips to preserve hum-cancelling**\n'
-        '- Wire the two coils in series or parallel as intended by the pickup design. Modern humbuckers use series for full output.\n'
-        '- When splitting coils (coil-split), you lose one coil and thus the hum cancellation — use noise-free split circuits or stacking designs if you need single-coil tone without hum.\n'
-        '- For phase switching (series ↔ parallel ↔ split) use proper switching that preserves magnetic/ electrical relationships.\n'
-    ),
-    'grounding': (
-        '**Grounding & shielding**\n'
-        '- Ground (pot backs, chassis) must be connected to pickup ground (bare or black depending on manufacturer).\n'
-        '- Solder the bare (shield) to ground; do not rely on friction contacts.\n'
-        '- Use shielding (copper tape, conductive paint) in control cavities and connect it to ground to reduce hum.\n'
-    ),
-    'phase_checks': (
-        '**Phase checking (practical)**\n'
-        '- Use a multimeter: measure DC resistance of coils to identify which wires are which.\n'
-        '- Use a small metal probe to touch pole pieces while measuring resistance: if resistance goes up when touched, that coil end is the positive lead for that polarity test.\n'
-        '- Swap coil connections if you detect reversed electrical polarity so North START == HOT mapping matches expected wiring.\n'
-    ),
-    'coil_split_hum': (
-        '**Coil-splitting & hum**\n'
-        '- Coil split disables one coil; hum cancellation is lost and single-coil hum will reappear.\n'
-        '- To reduce hum while split: use resistor or phase-cancellation circuits, or use stacked noiseless pickups that emulate single-coil tone without hum.\n'
-    ),
-}
+# Colour name -> hex for the Step 5 probe badges (same palette as everywhere else)
+PROBE_COLOR_HEX = GLOBAL_COLOR_HEX
+
+
+def _color_badge_html(color_name: str, label: str = '') -> str:
+    if not color_name or color_name == '--':
+        return f"<span style='padding:2px 6px;border-radius:4px;background:#f0f0f0;color:#333;border:1px solid #ddd'>{label or '—'}</span>"
+    hexcol = PROBE_COLOR_HEX.get(color_name, '#cccccc')
+    text_color = TEXT_ON_FILL.get(hexcol, '#ffffff')
+    return f"<span style='display:inline-flex;align-items:center;gap:8px'><span style='width:14px;height:14px;background:{hexcol};border:1px solid #222;display:inline-block;border-radius:3px'></span><span style='color:{text_color};background:transparent;padding:2px 6px;border-radius:4px'>{label or color_name}</span></span>"
 
-def _ai_helper_answer(q: str) -> str:
-    ql = (q or '').lower()
-    if not ql.strip():
-        return 'Ask a specific question about soldering, grounding, or hum-cancelling (e.g. "How do I solder a pot lug?", "Why does my coil hum after splitting?").'
-    # keyword matching
-    if any(k in ql for k in ('solder', 'soldering', 'iron', 'tin', 'solder tip', 'desolder')):
-        return FAQ_KB['soldering_tools'] + '\n\n' + FAQ_KB['soldering_steps']
-    if any(k in ql for k in ('hum', 'hum cancelling', 'hum-cancelling', 'noise cancelling', 'hum cancel')):
-        return FAQ_KB['hum_cancelling_overview'] + '\n\n' + FAQ_KB['hum_cancelling_when_wiring']
-    if any(k in ql for k in ('ground', 'shield', 'shielding', 'bare', 'grounding')):
-        return FAQ_KB['grounding']
-    if any(k in ql for k in ('phase', 'phase check', 'polarity', 'probe', 'resistance increase', 'reverse')):
-        return FAQ_KB['phase_checks']
-    if any(k in ql for k in ('split', 'coil split', 'coil-split', 'splitting')):
-        return FAQ_KB['coil_split_hum']
-    # fallback: give general guidance + resources
-    return (
-        "I don't have a perfect match for that question. Here are general tips:\n\n"
-        "- Be specific: mention if it's about a pot lug, jack, soldering stranded wire, coil-splitting wiring, or shielding.\n"
-        "- For step-by-step soldering: use a temperature-controlled iron, clean/tin the tip, pre-tin wires, heat the joint, apply solder to the joint, and let cool.\n\n"
-        "Useful references: StewMac (stewmac.com) and Seymour Duncan (seymourduncan.com) have practical wiring and soldering guides."
-    )
 
 # Initialize AI session state and render interactive AI sidebar
 init_ai_session_state()
 render_ai_sidebar()
 
-# Compact UI toggle: reduces padding, font-size and image heights to show more content
-if 'compact_ui' not in st.session_state:
-    st.session_state['compact_ui'] = False
-
+# Compact UI toggle (default lives in _DEFAULTS above)
 with st.sidebar:
     # Create the checkbox widget with a key; do not assign its return into session_state
     st.checkbox('Compact UI (less spacing)', value=st.session_state.get('compact_ui', False), key='compact_ui')
@@ -620,168 +563,6 @@ if st.session_state.get('compact_ui'):
     _apply_compact_css()
 
 
-# Top navigation for steps (Previous / Next)
-MAX_STEP = 6
-def _safe_rerun():
-    """Call Streamlit rerun if available; otherwise no-op."""
-    try:
-        # some Streamlit versions expose experimental_rerun
-        rerun = getattr(st, 'experimental_rerun', None)
-        if callable(rerun):
-            rerun()
-    except Exception:
-        # ignore if not supported in this Streamlit build
-        pass
-
-    """Try to call a local Ollama-like server and return {'ok':bool,'text':str,'error':str}.
-
-    The function tries multiple common endpoints (/api/generate, /api/chat, /api/completions)
-    and returns the first successful textual result. It sends the raw `prompt` as-is so
-    there's no added pre-coding of the user's question.
-    """
-    base = os.environ.get('OLLAMA_HOST', 'http://127.0.0.1:11434').rstrip('/')
-    # First, query /v1/models to discover available model ids and prefer an exact match
-    try:
-        models_url = base + '/v1/models'
-        if requests is not None:
-            mresp = requests.get(models_url, timeout=2.0)
-            if mresp.status_code == 200:
-                try:
-                    mj = mresp.json()
-                    if isinstance(mj, dict) and 'data' in mj and isinstance(mj['data'], list) and len(mj['data']) > 0:
-                        available = [d.get('id') for d in mj['data'] if isinstance(d, dict) and 'id' in d]
-                        # prefer explicit mistral id if present
-                        if model and model in available:
-                            model = model
-                        elif 'mistral:7b' in available:
-                            model = 'mistral:7b'
-                        elif len(available) > 0:
-                            model = available[0]
-                except Exception:
-                    pass
-    except Exception:
-        pass
-
-    # Try a variety of common endpoint paths and payload shapes (OpenAI-style first)
-    endpoints = [
-        # OpenAI-compatible chat completions
-        ('/v1/chat/completions', lambda p: {'model': model, 'messages': [{'role': 'user', 'content': p}]}),
-        # OpenAI-compatible completions
-        ('/v1/completions', lambda p: {'model': model, 'prompt': p, 'max_tokens': 512}),
-        # Older Ollama API shapes
-        ('/api/generate', lambda p: {'model': model, 'prompt': p, 'max_tokens': 512}),
-        ('/api/completions', lambda p: {'model': model, 'prompt': p, 'max_tokens': 512}),
-        ('/api/chat', lambda p: {'model': model, 'messages': [{'role': 'user', 'content': p}]}),
-        # fallback variations
-        ('/v1/generate', lambda p: {'model': model, 'prompt': p}),
-        ('/v1/chat', lambda p: {'model': model, 'messages': [{'role': 'user', 'content': p}]}),
-    ]
-    if requests is None:
-        return {'ok': False, 'text': '', 'error': 'requests library not available'}
-
-    headers = {'Content-Type': 'application/json'}
-    attempts = []
-    for path, payload_fn in endpoints:
-        url = base + path
-        try:
-            payload = payload_fn(prompt)
-            r = requests.post(url, json=payload, timeout=timeout)
-        except requests.exceptions.RequestException as e:
-            attempts.append({'url': url, 'status': 'request-failed', 'error': str(e)})
-            # try next endpoint
-            continue
-
-        # Record response for diagnostics
-        resp_text = ''
-        try:
-            resp_text = r.text or ''
-        except Exception:
-            resp_text = ''
-
-        if 200 <= r.status_code < 300:
-            # First attempt: try to decode as standard JSON (most OpenAI-compatible responses)
-            j = None
-            try:
-                j = r.json()
-            except Exception:
-                j = None
-
-            # If normal JSON parsed, extract common fields
-            if isinstance(j, dict):
-                if 'completion' in j and isinstance(j['completion'], str):
-                    return {'ok': True, 'text': j['completion'], 'error': ''}
-                if 'result' in j and isinstance(j['result'], str):
-                    return {'ok': True, 'text': j['result'], 'error': ''}
-                if 'output' in j and isinstance(j['output'], str):
-                    return {'ok': True, 'text': j['output'], 'error': ''}
-                if 'choices' in j and isinstance(j['choices'], list) and len(j['choices']) > 0:
-                    first = j['choices'][0]
-                    if isinstance(first, dict):
-                        if 'text' in first and isinstance(first['text'], str):
-                            return {'ok': True, 'text': first['text'], 'error': ''}
-                        if 'message' in first and isinstance(first['message'], dict) and 'content' in first['message']:
-                            return {'ok': True, 'text': first['message']['content'], 'error': ''}
-                for k in ('results', 'generations'):
-                    if k in j and isinstance(j[k], list) and len(j[k]) > 0:
-                        first = j[k][0]
-                        if isinstance(first, dict):
-                            for kk in ('text', 'output', 'content'):
-                                if kk in first and isinstance(first[kk], str):
-                                    return {'ok': True, 'text': first[kk], 'error': ''}
-
-            # If we failed to parse standard JSON, attempt to extract streamed JSON objects from the full text body
-            try:
-                collected = ''
-                # find all JSON object substrings and parse them individually
-                matches = re.findall(r'\{.*?\}', resp_text, flags=re.S)
-                for m in matches:
-                    try:
-                        o = json.loads(m)
-                        if isinstance(o, dict):
-                            if 'response' in o and isinstance(o.get('response'), str):
-                                collected += o.get('response')
-                            elif 'text' in o and isinstance(o.get('text'), str):
-                                collected += o.get('text')
-                    except Exception:
-                        continue
-                # If regex-based collection returned something, return it
-                if collected.strip():
-                    return {'ok': True, 'text': collected.strip(), 'error': ''}
-            except Exception:
-                pass
-
-            # fallback to raw text body if nothing else worked
-            if resp_text.strip():
-                return {'ok': True, 'text': resp_text, 'error': ''}
-
-            attempts.append({'url': url, 'status': r.status_code, 'body': resp_text})
-            # continue to next endpoint
-            continue
-        else:
-            # Non-2xx — include body for diagnostics
-            attempts.append({'url': url, 'status': r.status_code, 'body': resp_text})
-            # try next endpoint
-            continue
-
-    # If we reach here, none of the endpoints returned usable text. Try using app.llm_client.SimpleLLM if available.
-    fallback_msgs = []
-    try:
-        from app.llm_client import SimpleLLM
-        try:
-            llm = SimpleLLM(ollama_url=base, model=model)
-            res = llm.generate(prompt, max_tokens=512)
-            if res and isinstance(res, str) and res.strip():
-                return {'ok': True, 'text': res, 'error': ''}
-            fallback_msgs.append('SimpleLLM returned empty response')
-        except Exception as e:
-            fallback_msgs.append(f'SimpleLLM exception: {e}')
-    except Exception as e:
-        fallback_msgs.append(f'No SimpleLLM available: {e}')
-
-    # Build a helpful error message including collected diagnostics
-    diag_lines = [f"Attempt to call local AI failed. Base URL: {base}"]
-
-
 # Top navigation for steps (Previous / Next)
 MAX_STEP = 6
 def _safe_rerun():
@@ -809,18 +590,29 @@ def _on_next():
 
 # Simple JSON backup so progress persists across navigation/reloads
 BACKUP_PATH = os.path.join('app', 'session_backup.json')
+# Per-session bookkeeping that must not round-trip through the backup. '_ai_status' holds a
+# time.monotonic() stamp, which is meaningless after a restart (and would change the digest every
+# health check).
+_UNSAVED_KEYS = ('_backup_digest', '_ai_status')
+
+
 def _save_state():
     try:
-        data = {k: v for k, v in st.session_state.items()}
-        # Convert non-serializable values using str()
-        for k in list(data.keys()):
-            try:
-                json.dumps(data[k])
-            except Exception:
-                data[k] = str(data[k])
+        data = dict(st.session_state.items())
+        # Bookkeeping is per session; keep it out of the backup
+        for k in _UNSAVED_KEYS:
+            data.pop(k, None)
+        # Serialize in one pass; non-serializable values are converted with str() by the encoder.
+        # Encode before opening the file so a failure can't leave a truncated backup behind.
+        payload = json.dumps(data, ensure_ascii=False, default=str)
+        # Navigation callbacks and the end-of-run save usually see the same state; skip the rewrite
+        digest = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+        if digest == st.session_state.get('_backup_digest'):
+            return
         os.makedirs(os.path.dirname(BACKUP_PATH), exist_ok=True)
         with open(BACKUP_PATH, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.write(payload)
+        st.session_state['_backup_digest'] = digest
     except Exception:
         pass
 
@@ -831,7 +623,8 @@ def _load_state():
                 data = json.load(f)
             # Only set keys that are not already present to avoid overwriting live edits
             for k, v in data.items():
-                if k not in st.session_state:
+                # Older backups may still carry session-only keys
+                if k not in st.session_state and k not in _UNSAVED_KEYS:
                     st.session_state[k] = v
     except Exception:
         pass
@@ -842,23 +635,29 @@ _load_state()
 # Remove any lingering widget keys that were saved in session backup which would
 # conflict with newly-created widget keys (Streamlit forbids pre-setting widget
 # keys in session_state). This prevents StreamlitValueAssignmentNotAllowedError
-for _k in (
+_STALE_WIDGET_KEYS = frozenset({
     'open_neck_north', 'open_neck_south', 'open_bridge_north', 'open_bridge_south',
     'edit_neck_north', 'edit_neck_south', 'edit_bridge_north', 'edit_bridge_south',
     'swap_neck_north', 'swap_neck_south', 'swap_bridge_north', 'swap_bridge_south'
-):
-    if _k in st.session_state:
-        try:
-            del st.session_state[_k]
-        except Exception:
-            pass
+})
+for _k in _STALE_WIDGET_KEYS.intersection(st.session_state.keys()):
+    st.session_state.pop(_k, None)
+
+# Coil colour pickers allow two colours each (max_selections=2), and Streamlit rejects a widget
+# value longer than that. Backups saved before the cap can hold more, so trim them on load.
+_COIL_COLOR_KEYS = ('neck_north_colors', 'neck_south_colors', 'bridge_north_colors', 'bridge_south_colors')
+for _k in _COIL_COLOR_KEYS:
+    _v = st.session_state.get(_k)
+    if isinstance(_v, list) and len(_v) > 2:
+        st.session_state[_k] = _v[:2]
 
 # Helpers to avoid Streamlit errors when default values are not present in options
 def _safe_default_list(options, default):
     """Return only those defaults that exist in options (Streamlit requires this)."""
     if not default:
         return []
-    return [d for d in default if d in options]
+    opts = options if isinstance(options, (set, frozenset)) else frozenset(options)
+    return [d for d in default if d in opts]
 
 
 def _safe_index(options, value):
@@ -867,6 +666,47 @@ def _safe_index(options, value):
         return 0
     return options.index(value)
 
+# Probe answers that mean the meter dropped (reverse phase), matched case-insensitively in one scan
+_REVERSE_RE = re.compile(r'laskee|drop|decrease|fall|reverse|käänte', re.IGNORECASE)
+
+
+def _probe_is_reverse(choice) -> bool:
+    """Return True when a probe answer reads as reverse phase (user's rule)."""
+    return bool(choice) and _REVERSE_RE.search(str(choice)) is not None
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _analyze_pickup_cached(north_pair: tuple, south_pair: tuple, north_probe, south_probe, **kwargs) -> dict:
+    """`analyze_pickup` keyed on its inputs (coil colours passed as tuples so they hash).
+
+    Pressing Analyze re-analyses both pickups; a pickup whose inputs did not change is served
+    from the cache.
+    """
+    return analyze_pickup(list(north_pair), list(south_pair), north_probe, south_probe, **kwargs)
+
+
+def _analyze_pickups(ss) -> dict:
+    """Analyse neck and bridge from the session values in `ss`; returns {'neck': ..., 'bridge': ...}."""
+    analysis = {}
+    for pickup, p in (('neck', 'n'), ('bridge', 'b')):
+        analysis[pickup] = _analyze_pickup_cached(
+            tuple(ss.get(f'{pickup}_north_colors') or ()),
+            tuple(ss.get(f'{pickup}_south_colors') or ()),
+            ss.get(f'{p}_up_probe'),
+            ss.get(f'{p}_lo_probe'),
+            north_swap=ss.get(f'{p}_up_swap'),
+            south_swap=ss.get(f'{p}_lo_swap'),
+            bare=ss.get('bare'),
+            north_res_kohm=ss.get(f'{p}_up'),
+            south_res_kohm=ss.get(f'{p}_lo'),
+            north_red_wire=_none_if_dash(ss.get(f'{p}_up_probe_red_wire')),
+            north_black_wire=_none_if_dash(ss.get(f'{p}_up_probe_black_wire')),
+            south_red_wire=_none_if_dash(ss.get(f'{p}_lo_probe_red_wire')),
+            south_black_wire=_none_if_dash(ss.get(f'{p}_lo_probe_black_wire')),
+        )
+    return analysis
+
+
 # Helper functions for Step 6 analysis
 def _compute_wiring_order(upper_map: dict, lower_map: dict, wiring_type: str, bare_present: bool = False, upper_phase: str = 'Normal', lower_phase: str = 'Normal') -> dict:
     """Compute wiring order for given wiring_type.
@@ -909,21 +749,11 @@ def _compute_wiring_order(upper_map: dict, lower_map: dict, wiring_type: str, ba
         if bare_present:
             order['ground'].append('Bare')
 
-    elif wiring_type == 'slug_only':
-        # SLUG ONLY: North Start → HOT, North Finish + South Start + South Finish → GROUND
-        if u_start:
-            order['output'] = [u_start]
-        order['ground'] = [w for w in (u_finish, l_start, l_finish) if w]
-        if bare_present:
-            order['ground'].append('Bare')
-
-    elif wiring_type == 'screw_only':
-        # SCREW ONLY: Upper coil only - Upper Start → HOT, Upper Finish + Lower Start + Lower Finish → GROUND
-        if u_start:
-            order['output'] = [u_start]
-        order['ground'] = [w for w in (u_finish, l_start, l_finish) if w]
-        if bare_present:
-            order['ground'].append('Bare')
+    elif wiring_type in ('slug_only', 'screw_only'):
+        # SLUG ONLY / SCREW ONLY (coil split): the upper coil is kept in both variants -
+        # Upper Start → HOT, Upper Finish + Lower Start + Lower Finish (+ Bare) → GROUND
+        order['output'] = [w for w in (u_start,) if w]
+        order['ground'] = [w for w in (u_finish, l_start, l_finish, 'Bare' if bare_present else None) if w]
 
     else:
         order['notes'] = 'Unknown wiring variant requested.'
@@ -967,172 +797,51 @@ def _calculate_total_resistance(north_res_kohm, south_res_kohm, wiring_type: str
     else:
         return None
 
-def _find_candidate(base_name):
-    exts = ['.svg', '.png', '.jpg', '.jpeg']
-    places = [os.path.join('app', 'static'), os.path.join('app'), os.path.join('.')]
-    for p in places:
-        for e in exts:
-            cand = os.path.join(p, base_name + e)
-            if os.path.exists(cand):
-                return cand
-    return None
+@st.cache_data(max_entries=32, show_spinner=False)
+def _preview_overlay_svg(upper: tuple, lower: tuple, top_is_north: bool) -> str:
+    """Return the Step 6 coloured-ball overlay for one pickup.
 
-def render_pickup_preview(which, height=120):
+    `upper`/`lower` are (start, finish) colour tuples, so the markup is only rebuilt when a coil's
+    roles or the magnet orientation change.
+    """
+    return _overlay_svg(upper, lower, top_is_north, _PREVIEW_ROW_YS, 1, '#000000')
+
+
+def render_pickup_preview(which, upper_map, lower_map, height=120):
     """Render the original pickup SVG with the same coloured-ball overlay used in the sidebar.
 
-    `which` is 'neck' or 'bridge'.
+    `which` is 'neck' or 'bridge'; `upper_map`/`lower_map` are the coils' inferred start/finish maps.
     """
     north_img = _find_candidate('humbuckerNORTH')
     south_img = _find_candidate('humbuckerSOUTH')
-    img_path = north_img if (which == 'neck' and st.session_state.get('neck_img_choice', 'north') == 'north') or (which == 'bridge' and st.session_state.get('bridge_img_choice', 'north') == 'north') else south_img
+    img_path = north_img if st.session_state.get(f'{which}_img_choice', 'north') == 'north' else south_img
     if not img_path:
         st.info('Pickup image not found')
         return
-    if img_path.lower().endswith('.svg'):
-        try:
-            with open(img_path, 'r', encoding='utf-8') as f:
-                svg_html = f.read()
-            # Tint the pickup SVG background to match the selected top-coil color (if available)
-            try:
-                if which == 'neck':
-                    primary_name = (st.session_state.get('neck_north_colors', []) or [None])[0]
-                else:
-                    primary_name = (st.session_state.get('bridge_north_colors', []) or [None])[0]
-                primary_hex = COLOR_HEX.get(primary_name)
-                if primary_hex:
-                    svg_html = svg_html.replace('#d62728', primary_hex)
-            except Exception:
-                pass
-
-            def _none_if_dash(val):
-                return None if (val is None or (isinstance(val, str) and val.strip() == '--')) else val
-
-            if which == 'neck':
-                upper_map = infer_start_finish_from_probes(
-                    st.session_state.get('neck_north_colors', []),
-                    _none_if_dash(st.session_state.get('n_up_probe_red_wire')),
-                    _none_if_dash(st.session_state.get('n_up_probe_black_wire')),
-                    st.session_state.get('n_up_probe'),
-                    st.session_state.get('n_up_swap', False)
-                )
-                lower_map = infer_start_finish_from_probes(
-                    st.session_state.get('neck_south_colors', []),
-                    _none_if_dash(st.session_state.get('n_lo_probe_red_wire')),
-                    _none_if_dash(st.session_state.get('n_lo_probe_black_wire')),
-                    st.session_state.get('n_lo_probe'),
-                    st.session_state.get('n_lo_swap', False)
-                )
-            else:
-                upper_map = infer_start_finish_from_probes(
-                    st.session_state.get('bridge_north_colors', []),
-                    _none_if_dash(st.session_state.get('b_up_probe_red_wire')),
-                    _none_if_dash(st.session_state.get('b_up_probe_black_wire')),
-                    st.session_state.get('b_up_probe'),
-                    st.session_state.get('b_up_swap', False)
-                )
-                lower_map = infer_start_finish_from_probes(
-                    st.session_state.get('bridge_south_colors', []),
-                    _none_if_dash(st.session_state.get('b_lo_probe_red_wire')),
-                    _none_if_dash(st.session_state.get('b_lo_probe_black_wire')),
-                    st.session_state.get('b_lo_probe'),
-                    st.session_state.get('b_lo_swap', False)
-                )
-
-            COLOR_HEX = {
-                'Red': '#d62728',
-                'White': '#ffffff',
-                'Green': '#2ca02c',
-                'Black': '#111111',
-                'Yellow': '#ffbf00',
-                'Blue': '#1f77b4',
-                'Bare': '#888888'
-            }
+    if os.path.splitext(img_path)[1].lower() != '.svg':
+        st.image(img_path, use_column_width=True)
+        return
 
-            if which == 'neck':
-                top_is_north = st.session_state.get('neck_is_north_up', True)
-            else:
-                top_is_north = st.session_state.get('bridge_is_north_up', True)
-            coilA_pol = 'North' if top_is_north else 'South'
-            coilB_pol = 'South' if top_is_north else 'North'
-
-            def colour_svg_overlay(upper, lower):
-                # Desired visual order (top->bottom): CoilA START, CoilA END, CoilB END, CoilB START
-                vals = [upper.get('start'), upper.get('finish'), lower.get('finish'), lower.get('start')]
-                fills = [COLOR_HEX.get(v, '#cccccc') if v else '#cccccc' for v in vals]
-                texts = [v[0].upper() if v else '?' for v in vals]
-                parts = [f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 260 200" preserveAspectRatio="xMinYMin meet" width="220" height="200">']
-                r = 12
-                left_x = 18
-                default_circle_x = 140
-                line_fraction = 0.6
-                pol_text_offset = 50
-                pol_font_size = 10
-                y_a1 = 36
-                y_a2 = 76
-                y_b1 = 156
-                y_b2 = 196
-                y_positions = [y_a1, y_a2, y_b1, y_b2]
-
-                labels = [
-                    f'{coilA_pol} START +',
-                    f'{coilA_pol} END -',
-                    f'{coilB_pol} END -',
-                    f'{coilB_pol} START +',
-                ]
-
-                for i, (f, t, y) in enumerate(zip(fills, texts, y_positions)):
-                    try:
-                        fl = f.lower()
-                        if fl in ('#ffffff', '#ffbf00'):
-                            line_color = '#cccccc'
-                        elif fl in ('#111111', '#000000'):
-                            line_color = "#000000"
-                        else:
-                            line_color = f
-                    except Exception:
-                        line_color = '#cccccc'
-                    line_end_full = default_circle_x - r - 6
-                    line_end = left_x + int((line_end_full - left_x) * line_fraction)
-                    parts.append(f'<line x1="0" y1="{y}" x2="{left_x}" y2="{y}" stroke="{line_color}" stroke-width="1" stroke-opacity="0.75" />')
-                    parts.append(f'<line x1="{left_x}" y1="{y}" x2="{line_end}" y2="{y}" stroke="{line_color}" stroke-width="1" stroke-opacity="0.75" />')
-                    circle_x = line_end + r + 6
-                    polarity_word = 'Start' if 'start' in labels[i].lower() else 'End'
-                    pol_text_fill = '#ffffff' if f.lower() not in ('#ffffff', '#ffbf00') else '#111111'
-                    parts.append(f'<circle cx="{circle_x}" cy="{y}" r="{r}" fill="{f}" stroke="#222" stroke-width="1" />')
-                    text_fill = '#111111' if f.lower() in ('#ffffff', '#ffbf00') else '#ffffff'
-                    parts.append(f'<text x="{circle_x}" y="{y}" text-anchor="middle" dominant-baseline="middle" font-family="sans-serif" font-size="12" fill="{text_fill}">{t}</text>')
-                    parts.append(f'<text x="{circle_x + r + 10}" y="{y+4}" font-family="sans-serif" font-size="12" fill="#ffffff">{labels[i]}</text>')
-                # Draw a visible connector between the two middle circles (series link)
-                try:
-                    line_end_full = default_circle_x - r - 6
-                    line_end = left_x + int((line_end_full - left_x) * line_fraction)
-                    connector_x = line_end + r + 6
-                    y1 = y_positions[1]
-                    y2 = y_positions[2]
-                    gap = max(6, int((y2 - y1) * 0.18))
-                    y1s = y1 + gap
-                    y2s = y2 - gap
-                    parts.append(f'<line x1="{connector_x}" y1="{y1s}" x2="{connector_x}" y2="{y2s}" stroke="#ffffff" stroke-width="2" stroke-linecap="round" />')
-                    mid_y = int((y1s + y2s) / 2)
-                    series_x = max(left_x + 6, connector_x - (r + 64))
-                    parts.append(f'<text x="{series_x}" y="{mid_y + 4}" font-family="sans-serif" font-size="12" fill="#ffffff">Series</text>')
-                except Exception:
-                    pass
-                parts.append('</svg>')
-                return '\n'.join(parts)
-
-            overlay_html = colour_svg_overlay(upper_map, lower_map)
-            html = f"""
-            <div style="position:relative; width:100%; max-width:560px;">
-              <div style="position:relative; z-index:1;">{svg_html}</div>
-              <div style="position:absolute; right:8px; top:8px; z-index:2; pointer-events:none;">{overlay_html}</div>
-            </div>
-            """
-            components.html(html, height=height)
-        except Exception:
-            st.image(img_path, use_column_width=True)
-    else:
+    # Tint the pickup SVG background to match the selected top-coil color (if available)
+    primary_name = (st.session_state.get(f'{which}_north_colors') or [None])[0]
+    primary_hex = COLOR_HEX.get(primary_name)
+    top_is_north = st.session_state.get(f'{which}_is_north_up', True)
+
+    try:
+        svg_html = _load_tinted_svg(img_path, primary_hex)
+    except (OSError, UnicodeDecodeError):
+        # Unreadable SVG: let Streamlit show the file as a plain image instead
         st.image(img_path, use_column_width=True)
+        return
+    upper = (upper_map.get('start'), upper_map.get('finish'))
+    lower = (lower_map.get('start'), lower_map.get('finish'))
+    if not any(upper) and not any(lower):
+        # Nothing inferred for either coil: same as the sidebar, show the bare pickup
+        html = _PREVIEW_HTML_TMPL.format(svg=svg_html, overlay='')
+    else:
+        overlay_html = _preview_overlay_svg(upper, lower, bool(top_is_north))
+        html = _PREVIEW_HTML_TMPL.format(svg=svg_html, overlay=_PREVIEW_OVERLAY_TMPL.format(overlay=overlay_html))
+    components.html(html, height=height)
 
 def _check_easter_egg_hints(user_input: str) -> str:
     """Check if user input contains easter egg triggers and return witty response or empty string."""
@@ -1195,9 +904,8 @@ if step == 2:
     st.info('💡 **Hint:** If you\'re not sure which wires are which, use a multimeter to measure resistance between wire pairs. The pairs with similar resistance belong together!')
     st.caption('🎸 *Psst... try typing a famous sci-fi phrase or a number into the AI sidebar. You might discover something fun.* 😉')
     
-    COLOR_OPTIONS = ['Red', 'White', 'Green', 'Black', 'Yellow', 'Blue', 'Bare']
     col1 = st.multiselect('Neck wire colors (ordered)', COLOR_OPTIONS,
-                          default=_safe_default_list(COLOR_OPTIONS, st.session_state.get('neck_wire_colors', ['Red', 'White', 'Green', 'Black'])),
+                          default=_safe_default_list(_COLOR_SET, st.session_state.get('neck_wire_colors', ['Red', 'White', 'Green', 'Black'])),
                           key='neck_wire_colors')
     
     # Easter egg check for neck colors
@@ -1206,7 +914,7 @@ if step == 2:
         st.success(easter_response)
     
     col2 = st.multiselect('Bridge wire colors (ordered)', COLOR_OPTIONS,
-                          default=_safe_default_list(COLOR_OPTIONS, st.session_state.get('bridge_wire_colors', ['Red', 'White', 'Green', 'Black'])),
+                          default=_safe_default_list(_COLOR_SET, st.session_state.get('bridge_wire_colors', ['Red', 'White', 'Green', 'Black'])),
                           key='bridge_wire_colors')
     
     # Easter egg check for bridge colors
@@ -1222,28 +930,24 @@ if step == 3:
     st.write('Use a compass over the pickup (top of pickup). Slug = North coil; Screw = South coil.')
     st.caption('🧭 Yes, an actual compass. The same technology that helped Vikings navigate... now helps you wire pickups. Progress!')
     st.info('💡 **Hint:** Hold the compass FLAT over the pole pieces. The needle pointing away = North pole. The needle pointing toward = South pole. Simple physics!')
-    neck_toggle = st.checkbox('Neck — top is Slug (N)', value=st.session_state.get('neck_is_north_up', True), key='neck_is_north_up', on_change=_on_neck_toggle)
-    bridge_toggle = st.checkbox('Bridge — top is Slug (N)', value=st.session_state.get('bridge_is_north_up', True), key='bridge_is_north_up', on_change=_on_bridge_toggle)
-    # Keep the legacy orientation string in session_state for compatibility with other code
-    if st.session_state.get('neck_is_north_up', True):
-        st.session_state['neck_orientation'] = 'Top = Slug (N) / Bottom = Screw (S)'
-        n_pol = {'top': 'NORTH', 'bottom': 'SOUTH'}
-        st.session_state['neck_img_choice'] = 'north'
-    else:
-        st.session_state['neck_orientation'] = 'Top = Screw (S) / Bottom = Slug (N)'
-        n_pol = {'top': 'SOUTH', 'bottom': 'NORTH'}
-        st.session_state['neck_img_choice'] = 'south'
-
-    if st.session_state.get('bridge_is_north_up', True):
-        st.session_state['bridge_orientation'] = 'Top = Slug (N) / Bottom = Screw (S)'
-        b_pol = {'top': 'NORTH', 'bottom': 'SOUTH'}
-        st.session_state['bridge_img_choice'] = 'north'
-    else:
-        st.session_state['bridge_orientation'] = 'Top = Screw (S) / Bottom = Slug (N)'
-        b_pol = {'top': 'SOUTH', 'bottom': 'NORTH'}
-        st.session_state['bridge_img_choice'] = 'south'
-    st.write(f"Neck — Top: {n_pol['top']}, Bottom: {n_pol['bottom']}")
-    st.write(f"Bridge — Top: {b_pol['top']}, Bottom: {b_pol['bottom']}")
+    neck_toggle = st.checkbox('Neck — top is Slug (N)', value=st.session_state.get('neck_is_north_up', True), key='neck_is_north_up', on_change=_on_orientation_toggle, args=('neck',))
+    bridge_toggle = st.checkbox('Bridge — top is Slug (N)', value=st.session_state.get('bridge_is_north_up', True), key='bridge_is_north_up', on_change=_on_orientation_toggle, args=('bridge',))
+    # Keep the legacy orientation string in session_state for compatibility with other code.
+    # The checkbox return value is the current state, so branch on it rather than re-reading session_state.
+    neck_up = bool(neck_toggle)
+    st.session_state['neck_orientation'], n_pol, st.session_state['neck_img_choice'] = (
+        ('Top = Slug (N) / Bottom = Screw (S)', {'top': 'NORTH', 'bottom': 'SOUTH'}, 'north') if neck_up
+        else ('Top = Screw (S) / Bottom = Slug (N)', {'top': 'SOUTH', 'bottom': 'NORTH'}, 'south')
+    )
+    bridge_up = bool(bridge_toggle)
+    st.session_state['bridge_orientation'], b_pol, st.session_state['bridge_img_choice'] = (
+        ('Top = Slug (N) / Bottom = Screw (S)', {'top': 'NORTH', 'bottom': 'SOUTH'}, 'north') if bridge_up
+        else ('Top = Screw (S) / Bottom = Slug (N)', {'top': 'SOUTH', 'bottom': 'NORTH'}, 'south')
+    )
+    st.markdown(
+        f"Neck — Top: {n_pol['top']}, Bottom: {n_pol['bottom']}  \n"
+        f"Bridge — Top: {b_pol['top']}, Bottom: {b_pol['bottom']}"
+    )
     # Debug helper: show key orientation/image state when needed
     if st.checkbox('Show debug state', value=False, key='show_debug_state'):
         dbg = {k: st.session_state.get(k) for k in ['neck_is_north_up', 'bridge_is_north_up', 'neck_img_choice', 'bridge_img_choice', 'step']}
@@ -1287,25 +991,25 @@ if step == 5:
     cols[0].markdown(_render_color_badges(st.session_state.get('neck_north_colors', [])), unsafe_allow_html=True)
     cols[1].markdown('')
     with st.expander('Edit Neck — Top wire colors', expanded=st.session_state.get('exp_neck_north', False)):
-        st.multiselect('Neck top', neck_colors, default=default_neck_top, key='neck_north_colors', label_visibility='collapsed')
+        st.multiselect('Neck top', neck_colors, default=default_neck_top, key='neck_north_colors', max_selections=2, label_visibility='collapsed')
 
     cols = st.columns([6, 1])
     cols[0].markdown(_render_color_badges(st.session_state.get('neck_south_colors', [])), unsafe_allow_html=True)
     cols[1].markdown('')
     with st.expander('Neck — Bottom wire colors', expanded=st.session_state.get('exp_neck_south', False)):
-        st.multiselect('Neck bottom', [c for c in neck_colors if c not in st.session_state.get('neck_north_colors', [])], default=default_neck_bottom, key='neck_south_colors', label_visibility='collapsed')
+        st.multiselect('Neck bottom', [c for c in neck_colors if c not in st.session_state.get('neck_north_colors', [])], default=default_neck_bottom, key='neck_south_colors', max_selections=2, label_visibility='collapsed')
 
     cols = st.columns([6, 1])
     cols[0].markdown(_render_color_badges(st.session_state.get('bridge_north_colors', [])), unsafe_allow_html=True)
     cols[1].markdown('')
     with st.expander('Bridge — Top wire colors', expanded=st.session_state.get('exp_bridge_north', False)):
-        st.multiselect('Bridge top', bridge_colors, default=default_bridge_top, key='bridge_north_colors', label_visibility='collapsed')
+        st.multiselect('Bridge top', bridge_colors, default=default_bridge_top, key='bridge_north_colors', max_selections=2, label_visibility='collapsed')
 
     cols = st.columns([6, 1])
     cols[0].markdown(_render_color_badges(st.session_state.get('bridge_south_colors', [])), unsafe_allow_html=True)
     cols[1].markdown('')
     with st.expander('Bridge — Bottom wire colors', expanded=st.session_state.get('exp_bridge_south', False)):
-        st.multiselect('Bridge bottom', [c for c in bridge_colors if c not in st.session_state.get('bridge_north_colors', [])], default=default_bridge_bottom, key='bridge_south_colors', label_visibility='collapsed')
+        st.multiselect('Bridge bottom', [c for c in bridge_colors if c not in st.session_state.get('bridge_north_colors', [])], default=default_bridge_bottom, key='bridge_south_colors', max_selections=2, label_visibility='collapsed')
 
     # validate mapping
     mapping_ok = True
@@ -1320,24 +1024,6 @@ if step == 5:
     else:
         st.info('Please fix the mapping warnings above. Select exactly 2 colors per coil before proceeding.')
 
-    # Small helper: color name -> hex for badges
-    PROBE_COLOR_HEX = {
-        'Red': '#d62728',
-        'White': '#ffffff',
-        'Green': '#2ca02c',
-        'Black': '#111111',
-        'Yellow': '#ffbf00',
-        'Blue': '#1f77b4',
-        'Bare': '#888888'
-    }
-
-    def _color_badge_html(color_name: str, label: str = '') -> str:
-        if not color_name or color_name == '--':
-            return f"<span style='padding:2px 6px;border-radius:4px;background:#f0f0f0;color:#333;border:1px solid #ddd'>{label or '—'}</span>"
-        hexcol = PROBE_COLOR_HEX.get(color_name, '#cccccc')
-        text_color = '#111111' if hexcol.lower() in ('#ffffff', '#ffbf00') else '#ffffff'
-        return f"<span style='display:inline-flex;align-items:center;gap:8px'><span style='width:14px;height:14px;background:{hexcol};border:1px solid #222;display:inline-block;border-radius:3px'></span><span style='color:{text_color};background:transparent;padding:2px 6px;border-radius:4px'>{label or color_name}</span></span>"
-
     # Per-coil probe selection using the previously chosen coil colors
     neck_top_wires = st.session_state.get('neck_north_colors', [])
     neck_bottom_wires = st.session_state.get('neck_south_colors', [])
@@ -1383,162 +1069,54 @@ if step == 5:
     _coil_probe_row('Bridge — Lower coil', bridge_bottom_wires, 'b_lo_probe_red_wire', 'b_lo_probe_black_wire', 'b_lo_probe')
 
 
-    # Show inferred START/END mapping (preview) using probe->wire selections
-    def _none_if_dash(val):
-        return None if (val is None or (isinstance(val, str) and val.strip() == '--')) else val
-
-    try:
-        neck_upper_map = infer_start_finish_from_probes(
-            st.session_state.get('neck_north_colors', []),
-            _none_if_dash(st.session_state.get('n_up_probe_red_wire')),
-            _none_if_dash(st.session_state.get('n_up_probe_black_wire')),
-            st.session_state.get('n_up_probe'),
-            st.session_state.get('n_up_swap', False)
-        )
-        neck_lower_map = infer_start_finish_from_probes(
-            st.session_state.get('neck_south_colors', []),
-            _none_if_dash(st.session_state.get('n_lo_probe_red_wire')),
-            _none_if_dash(st.session_state.get('n_lo_probe_black_wire')),
-            st.session_state.get('n_lo_probe'),
-            st.session_state.get('n_lo_swap', False)
-        )
-        bridge_upper_map = infer_start_finish_from_probes(
-            st.session_state.get('bridge_north_colors', []),
-            _none_if_dash(st.session_state.get('b_up_probe_red_wire')),
-            _none_if_dash(st.session_state.get('b_up_probe_black_wire')),
-            st.session_state.get('b_up_probe'),
-            st.session_state.get('b_up_swap', False)
-        )
-        bridge_lower_map = infer_start_finish_from_probes(
-            st.session_state.get('bridge_south_colors', []),
-            _none_if_dash(st.session_state.get('b_lo_probe_red_wire')),
-            _none_if_dash(st.session_state.get('b_lo_probe_black_wire')),
-            st.session_state.get('b_lo_probe'),
-            st.session_state.get('b_lo_swap', False)
-        )
-
-
-        
-    except Exception:
-        # best-effort preview; ignore errors
-        pass
-
 if step == 6:
     st.header('Step 6 — Analyze Wiring & Generate Diagram')
     st.write('Review your phase testing results and generate the final wiring diagram.')
     st.caption('🎯 The moment of truth! Let\'s see if these pickups will hum-cancel or just... hum. (Spoiler: if they hum, blame the manufacturer, not the app. We\'re just the messenger.)')
     st.info('💡 **Hint:** Your wiring diagram shows START and FINISH for each coil. START wires go to HOT. FINISH wires (and BARE) go to GROUND. Series wires link the two coils together.')
-    
+
+    # Snapshot the earlier steps' inputs once; the blocks below make dozens of lookups
+    ss = {k: st.session_state[k] for k in _STEP6_KEYS if k in st.session_state}
+
     if st.button('Analyze wiring'):
         # Gather inputs and run analysis
-        neck_pair = st.session_state.get('neck_north_colors', [])
-        south_pair = st.session_state.get('neck_south_colors', [])
-        bridge_north = st.session_state.get('bridge_north_colors', [])
-        bridge_south = st.session_state.get('bridge_south_colors', [])
-        # Normalize probe->wire selections: the selectboxes include a '--' placeholder
-        def _none_if_dash(val):
-            return None if (val is None or (isinstance(val, str) and val.strip() == '--')) else val
-
-        analysis_neck = analyze_pickup(
-            neck_pair,
-            south_pair,
-            st.session_state.get('n_up_probe'),
-            st.session_state.get('n_lo_probe'),
-            north_swap=st.session_state.get('n_up_swap'),
-            south_swap=st.session_state.get('n_lo_swap'),
-            bare=st.session_state.get('bare'),
-            north_res_kohm=st.session_state.get('n_up'),
-            south_res_kohm=st.session_state.get('n_lo'),
-            north_red_wire=_none_if_dash(st.session_state.get('n_up_probe_red_wire')),
-            north_black_wire=_none_if_dash(st.session_state.get('n_up_probe_black_wire')),
-            south_red_wire=_none_if_dash(st.session_state.get('n_lo_probe_red_wire')),
-            south_black_wire=_none_if_dash(st.session_state.get('n_lo_probe_black_wire')),
-        )
-
-        analysis_bridge = analyze_pickup(
-            bridge_north,
-            bridge_south,
-            st.session_state.get('b_up_probe'),
-            st.session_state.get('b_lo_probe'),
-            north_swap=st.session_state.get('b_up_swap'),
-            south_swap=st.session_state.get('b_lo_swap'),
-            bare=st.session_state.get('bare'),
-            north_res_kohm=st.session_state.get('b_up'),
-            south_res_kohm=st.session_state.get('b_lo'),
-            north_red_wire=_none_if_dash(st.session_state.get('b_up_probe_red_wire')),
-            north_black_wire=_none_if_dash(st.session_state.get('b_up_probe_black_wire')),
-            south_red_wire=_none_if_dash(st.session_state.get('b_lo_probe_red_wire')),
-            south_black_wire=_none_if_dash(st.session_state.get('b_lo_probe_black_wire')),
-        )
-        st.session_state['analysis'] = {'neck': analysis_neck, 'bridge': analysis_bridge}
+        st.session_state['analysis'] = _analyze_pickups(ss)
         _save_state()
         st.success('✅ Analysis complete! Scroll down to see your wiring diagram.')
 
     # Display analysis results if available
     analysis = st.session_state.get('analysis', {})
-    if analysis:
-        neck = analysis.get('neck')
-        bridge = analysis.get('bridge')
-        
+    if not analysis:
+        st.caption('Run the analysis to see START/FINISH labels, previews and the wiring diagram.')
+    else:
+        # Infer START/FINISH for every coil once; the labels, previews, wiring suggestions and the
+        # JSON summary below all read from this instead of re-running the inference.
+        maps = _infer_coil_maps(ss)
+
         st.header('Neck pickup')
-        # Recompute mapping so we can show explicit START/END labels
-        try:
-            neck_upper_map = infer_start_finish_from_probes(
-                st.session_state.get('neck_north_colors', []),
-                st.session_state.get('n_up_probe_red_wire'),
-                st.session_state.get('n_up_probe_black_wire'),
-                st.session_state.get('n_up_probe'),
-                st.session_state.get('n_up_swap', False)
-            )
-            neck_lower_map = infer_start_finish_from_probes(
-                st.session_state.get('neck_south_colors', []),
-                st.session_state.get('n_lo_probe_red_wire'),
-                st.session_state.get('n_lo_probe_black_wire'),
-                st.session_state.get('n_lo_probe'),
-                st.session_state.get('n_lo_swap', False)
-            )
-            st.write(f"NORTH Start: {neck_upper_map.get('start')}")
-            st.write(f"NORTH End: {neck_upper_map.get('finish')}")
-            st.write(f"SOUTH End: {neck_lower_map.get('finish')}")
-            st.write(f"SOUTH Start: {neck_lower_map.get('start')}")
-            
-        except Exception:
-            st.write(neck)
-        render_pickup_preview('neck', height=240)
+        # Show explicit START/END labels from the shared mappings (always dicts, so no fallback needed)
+        neck_upper_map = maps['neck_upper']
+        neck_lower_map = maps['neck_lower']
+        # One markdown element (hard line breaks) instead of four separate writes
+        st.markdown(
+            f"NORTH Start: {neck_upper_map.get('start')}  \n"
+            f"NORTH End: {neck_upper_map.get('finish')}  \n"
+            f"SOUTH End: {neck_lower_map.get('finish')}  \n"
+            f"SOUTH Start: {neck_lower_map.get('start')}"
+        )
+        render_pickup_preview('neck', maps['neck_upper'], maps['neck_lower'], height=240)
 
         # Show explicit wiring suggestion for the neck based on analysis result
         try:
-            # Recompute start/finish mappings so we can let the user choose which end is HOT
-            def _none_if_dash(val):
-                return None if (val is None or (isinstance(val, str) and val.strip() == '--')) else val
-
-            neck_upper_map = infer_start_finish_from_probes(
-                st.session_state.get('neck_north_colors', []),
-                _none_if_dash(st.session_state.get('n_up_probe_red_wire')),
-                _none_if_dash(st.session_state.get('n_up_probe_black_wire')),
-                st.session_state.get('n_up_probe'),
-                st.session_state.get('n_up_swap', False)
-            )
-            neck_lower_map = infer_start_finish_from_probes(
-                st.session_state.get('neck_south_colors', []),
-                _none_if_dash(st.session_state.get('n_lo_probe_red_wire')),
-                _none_if_dash(st.session_state.get('n_lo_probe_black_wire')),
-                st.session_state.get('n_lo_probe'),
-                st.session_state.get('n_lo_swap', False)
-            )
-
-            # Determine probe polarity (reverse vs normal) using user's rule:
-            def _probe_is_reverse(choice):
-                if not choice:
-                    return False
-                c = str(choice).lower()
-                return any(k in c for k in ('laskee', 'drop', 'decrease', 'fall', 'reverse', 'käänte'))
+            # Start/finish mappings computed once at the top of Step 6
+            neck_upper_map = maps['neck_upper']
+            neck_lower_map = maps['neck_lower']
 
-            neck_north_phase = 'Reverse' if _probe_is_reverse(st.session_state.get('n_up_probe')) else 'Normal'
-            neck_south_phase = 'Reverse' if _probe_is_reverse(st.session_state.get('n_lo_probe')) else 'Normal'
+            neck_north_phase = 'Reverse' if _probe_is_reverse(ss.get('n_up_probe')) else 'Normal'
+            neck_south_phase = 'Reverse' if _probe_is_reverse(ss.get('n_lo_probe')) else 'Normal'
 
-            neck_north_res = st.session_state.get('n_up')
-            neck_south_res = st.session_state.get('n_lo')
+            neck_north_res = ss.get('n_up')
+            neck_south_res = ss.get('n_lo')
 
             # Let user select wiring type for neck pickup
             neck_wiring_choice = st.selectbox(
@@ -1548,76 +1126,43 @@ if step == 6:
                 key='neck_wiring_choice'
             )
 
-            bare_present = st.session_state.get('bare', False)
+            bare_present = ss.get('bare', False)
 
             # Calculate expected resistance for this configuration
             neck_total_res = _calculate_total_resistance(neck_north_res, neck_south_res, neck_wiring_choice)
 
             # Show which coil is which magnet type
-            neck_north_magnet = 'Slug (North)' if 'Slug' in str(st.session_state.get('neck_north_colors', [''])[0]) else 'Screw (South)'
+            neck_north_magnet = 'Slug (North)' if 'Slug' in str((ss.get('neck_north_colors') or [''])[0]) else 'Screw (South)'
             neck_south_magnet = 'Screw (South)' if neck_north_magnet == 'Slug (North)' else 'Slug (North)'
 
             neck_order = _compute_wiring_order(neck_upper_map, neck_lower_map, neck_wiring_choice, bare_present=bare_present, upper_phase=neck_north_phase, lower_phase=neck_south_phase)
             # Wiring details will be shown in summary at bottom
 
-        except Exception as e:
+        except (TypeError, ValueError) as e:
             st.error(f"Error computing neck wiring: {e}")
 
         st.header('Bridge pickup')
-        try:
-            bridge_upper_map = infer_start_finish_from_probes(
-                st.session_state.get('bridge_north_colors', []),
-                st.session_state.get('b_up_probe_red_wire'),
-                st.session_state.get('b_up_probe_black_wire'),
-                st.session_state.get('b_up_probe'),
-                st.session_state.get('b_up_swap', False)
-            )
-            bridge_lower_map = infer_start_finish_from_probes(
-                st.session_state.get('bridge_south_colors', []),
-                st.session_state.get('b_lo_probe_red_wire'),
-                st.session_state.get('b_lo_probe_black_wire'),
-                st.session_state.get('b_lo_probe'),
-                st.session_state.get('b_lo_swap', False)
-            )
-            st.write(f"NORTH Start: {bridge_upper_map.get('start')}")
-            st.write(f"NORTH End: {bridge_upper_map.get('finish')}")
-            st.write(f"SOUTH End: {bridge_lower_map.get('finish')}")
-            st.write(f"SOUTH Start: {bridge_lower_map.get('start')}")
-        except Exception:
-            st.write(bridge)
-        render_pickup_preview('bridge', height=240)
+        bridge_upper_map = maps['bridge_upper']
+        bridge_lower_map = maps['bridge_lower']
+        # One markdown element (hard line breaks) instead of four separate writes
+        st.markdown(
+            f"NORTH Start: {bridge_upper_map.get('start')}  \n"
+            f"NORTH End: {bridge_upper_map.get('finish')}  \n"
+            f"SOUTH End: {bridge_lower_map.get('finish')}  \n"
+            f"SOUTH Start: {bridge_lower_map.get('start')}"
+        )
+        render_pickup_preview('bridge', maps['bridge_upper'], maps['bridge_lower'], height=240)
 
         # Show explicit wiring suggestion for bridge
         try:
-            def _none_if_dash(val):
-                return None if (val is None or (isinstance(val, str) and val.strip() == '--')) else val
-
-            upper_map = infer_start_finish_from_probes(
-                st.session_state.get('bridge_north_colors', []),
-                _none_if_dash(st.session_state.get('b_up_probe_red_wire')),
-                _none_if_dash(st.session_state.get('b_up_probe_black_wire')),
-                st.session_state.get('b_up_probe'),
-                st.session_state.get('b_up_swap', False)
-            )
-            lower_map = infer_start_finish_from_probes(
-                st.session_state.get('bridge_south_colors', []),
-                _none_if_dash(st.session_state.get('b_lo_probe_red_wire')),
-                _none_if_dash(st.session_state.get('b_lo_probe_black_wire')),
-                st.session_state.get('b_lo_probe'),
-                st.session_state.get('b_lo_swap', False)
-            )
-
-            def _probe_is_reverse(choice):
-                if not choice:
-                    return False
-                c = str(choice).lower()
-                return any(k in c for k in ('laskee', 'drop', 'decrease', 'fall', 'reverse', 'käänte'))
+            upper_map = maps['bridge_upper']
+            lower_map = maps['bridge_lower']
 
-            bridge_north_phase = 'Reverse' if _probe_is_reverse(st.session_state.get('b_up_probe')) else 'Normal'
-            bridge_south_phase = 'Reverse' if _probe_is_reverse(st.session_state.get('b_lo_probe')) else 'Normal'
+            bridge_north_phase = 'Reverse' if _probe_is_reverse(ss.get('b_up_probe')) else 'Normal'
+            bridge_south_phase = 'Reverse' if _probe_is_reverse(ss.get('b_lo_probe')) else 'Normal'
 
-            bridge_north_res = st.session_state.get('b_up')
-            bridge_south_res = st.session_state.get('b_lo')
+            bridge_north_res = ss.get('b_up')
+            bridge_south_res = ss.get('b_lo')
 
             bridge_wiring_choice = st.selectbox(
                 'Bridge pickup wiring:',
@@ -1626,17 +1171,17 @@ if step == 6:
                 key='bridge_wiring_choice'
             )
 
-            bare_present = st.session_state.get('bare', False)
+            bare_present = ss.get('bare', False)
 
             bridge_total_res = _calculate_total_resistance(bridge_north_res, bridge_south_res, bridge_wiring_choice)
 
-            bridge_north_magnet = 'Slug (North)' if 'Slug' in str(st.session_state.get('bridge_north_colors', [''])[0]) else 'Screw (South)'
+            bridge_north_magnet = 'Slug (North)' if 'Slug' in str((ss.get('bridge_north_colors') or [''])[0]) else 'Screw (South)'
             bridge_south_magnet = 'Screw (South)' if bridge_north_magnet == 'Slug (North)' else 'Slug (North)'
 
             order = _compute_wiring_order(upper_map, lower_map, bridge_wiring_choice, bare_present=bare_present, upper_phase=bridge_north_phase, lower_phase=bridge_south_phase)
             # Wiring details will be shown in summary at bottom
 
-        except Exception as e:
+        except (TypeError, ValueError) as e:
             st.error(f"Error computing bridge wiring: {e}")
 
         # Add inter-pickup connection mode selector
@@ -1656,56 +1201,22 @@ if step == 6:
             st.subheader('Complete Wiring JSON')
             st.markdown('This JSON includes all wiring details for both pickups and their inter-pickup connection.')
 
-            # Helper to check for None/'--' placeholder in probe->wire selections
-            def _none_if_dash(val):
-                return None if (val is None or (isinstance(val, str) and val.strip() == '--')) else val
-
-            # Recompute mappings for both pickups using the helper that avoids '--' placeholders
-            neck_upper_map = infer_start_finish_from_probes(
-                st.session_state.get('neck_north_colors', []),
-                _none_if_dash(st.session_state.get('n_up_probe_red_wire')),
-                _none_if_dash(st.session_state.get('n_up_probe_black_wire')),
-                st.session_state.get('n_up_probe'),
-                st.session_state.get('n_up_swap', False)
-            )
-            neck_lower_map = infer_start_finish_from_probes(
-                st.session_state.get('neck_south_colors', []),
-                _none_if_dash(st.session_state.get('n_lo_probe_red_wire')),
-                _none_if_dash(st.session_state.get('n_lo_probe_black_wire')),
-                st.session_state.get('n_lo_probe'),
-                st.session_state.get('n_lo_swap', False)
-            )
-
-            upper_map = infer_start_finish_from_probes(
-                st.session_state.get('bridge_north_colors', []),
-                _none_if_dash(st.session_state.get('b_up_probe_red_wire')),
-                _none_if_dash(st.session_state.get('b_up_probe_black_wire')),
-                st.session_state.get('b_up_probe'),
-                st.session_state.get('b_up_swap', False)
-            )
-            lower_map = infer_start_finish_from_probes(
-                st.session_state.get('bridge_south_colors', []),
-                _none_if_dash(st.session_state.get('b_lo_probe_red_wire')),
-                _none_if_dash(st.session_state.get('b_lo_probe_black_wire')),
-                st.session_state.get('b_lo_probe'),
-                st.session_state.get('b_lo_swap', False)
-            )
+            # Mappings for both pickups (computed once at the top of Step 6)
+            neck_upper_map = maps['neck_upper']
+            neck_lower_map = maps['neck_lower']
 
-            def _probe_is_reverse(choice):
-                if not choice:
-                    return False
-                c = str(choice).lower()
-                return any(k in c for k in ('laskee', 'drop', 'decrease', 'fall', 'reverse', 'käänte'))
+            upper_map = maps['bridge_upper']
+            lower_map = maps['bridge_lower']
 
-            neck_north_phase = 'Reverse' if _probe_is_reverse(st.session_state.get('n_up_probe')) else 'Normal'
-            neck_south_phase = 'Reverse' if _probe_is_reverse(st.session_state.get('n_lo_probe')) else 'Normal'
-            bridge_north_phase = 'Reverse' if _probe_is_reverse(st.session_state.get('b_up_probe')) else 'Normal'
-            bridge_south_phase = 'Reverse' if _probe_is_reverse(st.session_state.get('b_lo_probe')) else 'Normal'
+            neck_north_phase = 'Reverse' if _probe_is_reverse(ss.get('n_up_probe')) else 'Normal'
+            neck_south_phase = 'Reverse' if _probe_is_reverse(ss.get('n_lo_probe')) else 'Normal'
+            bridge_north_phase = 'Reverse' if _probe_is_reverse(ss.get('b_up_probe')) else 'Normal'
+            bridge_south_phase = 'Reverse' if _probe_is_reverse(ss.get('b_lo_probe')) else 'Normal'
 
-            neck_north_res = st.session_state.get('n_up')
-            neck_south_res = st.session_state.get('n_lo')
-            bridge_north_res = st.session_state.get('b_up')
-            bridge_south_res = st.session_state.get('b_lo')
+            neck_north_res = ss.get('n_up')
+            neck_south_res = ss.get('n_lo')
+            bridge_north_res = ss.get('b_up')
+            bridge_south_res = ss.get('b_lo')
 
             neck_wiring_choice = st.session_state.get('neck_wiring_choice', 'series')
             bridge_wiring_choice = st.session_state.get('bridge_wiring_choice', 'series')
@@ -1713,7 +1224,7 @@ if step == 6:
             neck_total_res = _calculate_total_resistance(neck_north_res, neck_south_res, neck_wiring_choice)
             bridge_total_res = _calculate_total_resistance(bridge_north_res, bridge_south_res, bridge_wiring_choice)
 
-            bare_present = st.session_state.get('bare', False)
+            bare_present = ss.get('bare', False)
 
             neck_order = _compute_wiring_order(neck_upper_map, neck_lower_map, neck_wiring_choice, bare_present=bare_present, upper_phase=neck_north_phase, lower_phase=neck_south_phase)
 
@@ -1728,7 +1239,7 @@ if step == 6:
             if show_neck:
                 if both_coil_split:
                     # Coil split mode: determine which magnet pole is upper for NECK
-                    neck_upper_is_south = 'Screw' in str(st.session_state.get('neck_north_colors', [''])[0]) if st.session_state.get('neck_north_colors') else False
+                    neck_upper_is_south = 'Screw' in str(ss.get('neck_north_colors', [''])[0]) if ss.get('neck_north_colors') else False
                     
                     if neck_upper_is_south:
                         # Upper coil is south (screw), so use lower coil
@@ -1801,7 +1312,7 @@ if step == 6:
                 if both_coil_split:
                     # Coil split mode: determine which magnet pole is upper for BRIDGE
                     # BRIDGE uses opposite pole from NECK
-                    neck_upper_is_south = 'Screw' in str(st.session_state.get('neck_north_colors', [''])[0]) if st.session_state.get('neck_north_colors') else False
+                    neck_upper_is_south = 'Screw' in str(ss.get('neck_north_colors', [''])[0]) if ss.get('neck_north_colors') else False
                     
                     if neck_upper_is_south:
                         # NECK upper is south, so BRIDGE upper must be north (slug coil)
@@ -1896,7 +1407,7 @@ if step == 6:
                     # Keep Bare on the ground bus, but avoid mixing it into the inter-pickup link
                     def _split_ground(gs: list):
                         main = [g for g in gs if g and g != 'Bare']
-                        has_bare = any(g == 'Bare' for g in gs)
+                        has_bare = 'Bare' in gs
                         return main, has_bare
 
                     neck_ground, neck_has_bare = _split_ground(neck_ground_raw)
@@ -1904,15 +1415,20 @@ if step == 6:
 
                     if pickups_connection == 'series':
                         # Series between pickups: neck ground -> bridge hot; bridge ground to overall ground
+                        series_steps = {
+                            'hot_to_output': neck_hot,
+                            'link_neck_ground_to_bridge_hot': neck_ground + bridge_hot,
+                            'ground': bridge_ground + (['Bare'] if (neck_has_bare or bridge_has_bare) else [])
+                        }
+                        # Include internal series links for clarity when pickups are forced to series
+                        if neck_order.get('series') or order.get('series'):
+                            series_steps['pickup_internal_series_links'] = {
+                                'neck_series_link': neck_order.get('series', []),
+                                'bridge_series_link': order.get('series', [])
+                            }
                         combined_wiring = {
                             'mode': 'series',
-                            'steps': {
-                                'hot_to_output': neck_hot,
-                                'link_neck_ground_to_bridge_hot': neck_ground + bridge_hot,
-                                'ground': bridge_ground + (['Bare'] if (neck_has_bare or bridge_has_bare) else [])
-                            }
-                            # Include internal series links for clarity when pickups are forced to series
-                            if neck_order.get('series') or order.get('series') else None
+                            'steps': series_steps
                         }
                     else:
                         # Parallel between pickups: both hots together, both grounds together
@@ -1977,19 +1493,19 @@ if step == 6:
                     st.markdown("*NECK* - N-S orientation")
                     # Config A: NECK is always N-S (North on top)
                     try:
-                        with open('app/humbuckerNORTH.svg', 'r') as f:
-                            svg_content = f.read()
+                        svg_path = os.path.join('app', 'humbuckerNORTH.svg')
+                        svg_content = _load_svg_text(svg_path, os.path.getmtime(svg_path))
                         st.image(svg_content, width=200)
-                    except:
+                    except OSError:
                         st.error("Could not load humbuckerNORTH.svg")
                     
                     st.markdown("*BRIDGE* - S-N orientation")
                     # Config A: BRIDGE is always S-N (South on top)
                     try:
-                        with open('app/humbuckerSOUTH.svg', 'r') as f:
-                            svg_content = f.read()
+                        svg_path = os.path.join('app', 'humbuckerSOUTH.svg')
+                        svg_content = _load_svg_text(svg_path, os.path.getmtime(svg_path))
                         st.image(svg_content, width=200)
-                    except:
+                    except OSError:
                         st.error("Could not load humbuckerSOUTH.svg")
                     st.caption("✅ Opposite magnets + same phase")
                 
@@ -1998,19 +1514,19 @@ if step == 6:
                     st.markdown("*NECK* - N-S orientation")
                     # Config B: NECK is N-S (North on top)
                     try:
-                        with open('app/humbuckerNORTH.svg', 'r') as f:
-                            svg_content = f.read()
+                        svg_path = os.path.join('app', 'humbuckerNORTH.svg')
+                        svg_content = _load_svg_text(svg_path, os.path.getmtime(svg_path))
                         st.image(svg_content, width=200)
-                    except:
+                    except OSError:
                         st.error("Could not load humbuckerNORTH.svg")
                     
                     st.markdown("*BRIDGE* - N-S orientation")
                     # Config B: BRIDGE is also N-S (North on top)
                     try:
-                        with open('app/humbuckerNORTH.svg', 'r') as f:
-                            svg_content = f.read()
+                        svg_path = os.path.join('app', 'humbuckerNORTH.svg')
+                        svg_content = _load_svg_text(svg_path, os.path.getmtime(svg_path))
                         st.image(svg_content, width=200)
-                    except:
+                    except OSError:
                         st.error("Could not load humbuckerNORTH.svg")
                     st.caption("✅ Same magnets + opposite phase")
                 
@@ -2048,24 +1564,21 @@ if step == 6:
                 
                 return issues, warnings
             
-            try:
-                hum_issues, hum_warnings = _validate_hum_cancelling()
-                
-                if hum_issues:
-                    st.error('**Hum-Cancelling Issues Detected:**')
-                    for issue in hum_issues:
-                        st.markdown(issue)
-                    st.markdown('💡 **Fix:** Swap one coil\'s wiring (START ↔ FINISH) to reverse its phase. Or twist the coil\'s wires to reverse polarity.')
-                
-                if hum_warnings:
-                    for warning in hum_warnings:
-                        if '✅' in warning:
-                            st.success(warning)
-                        else:
-                            st.warning(warning)
-            
-            except Exception as e:
-                st.info(f"Could not validate hum-cancelling: {e}")
+            # Plain phase comparisons; nothing here can raise
+            hum_issues, hum_warnings = _validate_hum_cancelling()
+
+            if hum_issues:
+                st.error('**Hum-Cancelling Issues Detected:**')
+                for issue in hum_issues:
+                    st.markdown(issue)
+                st.markdown('💡 **Fix:** Swap one coil\'s wiring (START ↔ FINISH) to reverse its phase. Or twist the coil\'s wires to reverse polarity.')
+
+            if hum_warnings:
+                for warning in hum_warnings:
+                    if '✅' in warning:
+                        st.success(warning)
+                    else:
+                        st.warning(warning)
             
             # Display simplified wiring summary
             st.subheader('📋 Wiring Summary')
@@ -2077,8 +1590,9 @@ if step == 6:
                 total_res = wiring_config.get('total_resistance_kohm', 'N/A')
                 
                 with st.expander(f"**{pickup_name}** - {total_res} kΩ"):
-                    st.markdown(f"**Wiring Mode:** {pickup.get('variant', 'N/A')}")
-                    
+                    # Build the whole summary as one markdown element rather than one per line
+                    md = [f"**Wiring Mode:** {pickup.get('variant', 'N/A')}", '']
+
                     # Show coil details
                     coils = pickup.get('coils', {})
                     if isinstance(coils, dict):
@@ -2088,17 +1602,18 @@ if step == 6:
                                 start = coil.get('start', 'N/A')
                                 finish = coil.get('finish', 'N/A')
                                 phase = coil.get('phase', 'N/A')
-                                st.markdown(f"- **{coil_name}** ({phase}): {start} (START) → {finish} (FINISH)")
-                    
+                                md.append(f"- **{coil_name}** ({phase}): {start} (START) → {finish} (FINISH)")
+
                     # Show wiring order
                     if wiring_config:
-                        st.markdown("**Connection:**")
+                        md += ['', "**Connection:**", '']
                         if wiring_config.get('output'):
-                            st.markdown(f"  - HOT: {', '.join(wiring_config['output'])}")
+                            md.append(f"  - HOT: {', '.join(wiring_config['output'])}")
                         if wiring_config.get('ground'):
-                            st.markdown(f"  - GROUND: {', '.join(wiring_config['ground'])}")
+                            md.append(f"  - GROUND: {', '.join(wiring_config['ground'])}")
                         if wiring_config.get('series'):
-                            st.markdown(f"  - SERIES LINK: {', '.join(wiring_config['series'])}")
+                            md.append(f"  - SERIES LINK: {', '.join(wiring_config['series'])}")
+                    st.markdown('\n'.join(md))
             
             # Show combined wiring if both pickups
             if combined_wiring:
@@ -2107,7 +1622,7 @@ if step == 6:
                 if combined_total_res:
                     st.markdown(f"**Total Resistance:** {round(combined_total_res, 2)} kΩ")
                 
-                steps = combined_wiring.get('steps', {})
+                steps = combined_wiring.get('steps') or {}
                 if steps.get('note'):
                     st.info(steps['note'])
             
@@ -2116,69 +1631,10 @@ if step == 6:
                 json_str = json.dumps(wiring_json, indent=2)
                 st.code(json_str, language='json')
                 st.markdown('**For AI Analysis:** Copy this JSON and ask: "Are these humbuckers correctly configured for hum cancelling?"')
-        except Exception as e:
+        except (TypeError, ValueError, KeyError) as e:
             st.error(f"Error computing wiring order: {e}")
 
 
-# Quick-rule: apply North-reverse assumption
-def _apply_north_reverse_rule():
-    # mark north (top) coil as reverse and south (bottom) as normal
-    st.session_state['north_reverse_phased'] = True
-    # set probe radio answers: North reversed, South normal
-    # These strings match the options used in the radio widgets
-    st.session_state['n_up_probe'] = 'Laskee (käänteinen)'
-    st.session_state['n_lo_probe'] = 'Nousee (normaali)'
-    # ensure swap flags are off by default (user can adjust)
-    st.session_state['n_up_swap'] = False
-    st.session_state['n_lo_swap'] = False
-
-    # recompute analysis using existing color selections and probe->wire choices
-    def _none_if_dash(val):
-        return None if (val is None or (isinstance(val, str) and val.strip() == '--')) else val
-
-    neck_pair = st.session_state.get('neck_north_colors', [])
-    south_pair = st.session_state.get('neck_south_colors', [])
-    bridge_north = st.session_state.get('bridge_north_colors', [])
-    bridge_south = st.session_state.get('bridge_south_colors', [])
-
-    analysis_neck = analyze_pickup(
-        neck_pair,
-        south_pair,
-        st.session_state.get('n_up_probe'),
-        st.session_state.get('n_lo_probe'),
-        north_swap=st.session_state.get('n_up_swap'),
-        south_swap=st.session_state.get('n_lo_swap'),
-        bare=st.session_state.get('bare'),
-        north_res_kohm=st.session_state.get('n_up'),
-        south_res_kohm=st.session_state.get('n_lo'),
-        north_red_wire=_none_if_dash(st.session_state.get('n_up_probe_red_wire')),
-        north_black_wire=_none_if_dash(st.session_state.get('n_up_probe_black_wire')),
-        south_red_wire=_none_if_dash(st.session_state.get('n_lo_probe_red_wire')),
-        south_black_wire=_none_if_dash(st.session_state.get('n_lo_probe_black_wire')),
-    )
-
-    analysis_bridge = analyze_pickup(
-        bridge_north,
-        bridge_south,
-        st.session_state.get('b_up_probe'),
-        st.session_state.get('b_lo_probe'),
-        north_swap=st.session_state.get('b_up_swap'),
-        south_swap=st.session_state.get('b_lo_swap'),
-        bare=st.session_state.get('bare'),
-        north_res_kohm=st.session_state.get('b_up'),
-        south_res_kohm=st.session_state.get('b_lo'),
-        north_red_wire=_none_if_dash(st.session_state.get('b_up_probe_red_wire')),
-        north_black_wire=_none_if_dash(st.session_state.get('b_up_probe_black_wire')),
-        south_red_wire=_none_if_dash(st.session_state.get('b_lo_probe_red_wire')),
-        south_black_wire=_none_if_dash(st.session_state.get('b_lo_probe_black_wire')),
-    )
-
-    st.session_state['analysis'] = {'neck': analysis_neck, 'bridge': analysis_bridge}
-    _save_state()
-    # stay on the same step but show a short success message
-    st.success('Applied North-reverse rule and recomputed analysis.')
-
-
 # Restart button (outside all expanders)
 st.markdown('---')
 st.caption('💥 **Made a mistake?** We all do. Even Jimi Hendrix probably mis-wired a pickup once (citation needed).')
@@ -2187,14 +1643,12 @@ if st.button('Restart'):
     try:
         if os.path.exists(BACKUP_PATH):
             os.remove(BACKUP_PATH)
-    except Exception:
+    except OSError:
         pass
     for k in list(st.session_state.keys()):
         del st.session_state[k]
     _safe_rerun()
 
 # Persist current state on each run so changes are saved automatically
-try:
-    _save_state()
-except Exception:
-    pass
+# (_save_state already swallows its own I/O errors)
+_save_state()
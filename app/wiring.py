@@ -3,6 +3,7 @@
 This module is intentionally small and dependency-free so it can be imported
 from a minimal `main.py` Streamlit app.
 """
+from functools import lru_cache
 from typing import List, Dict, Optional
 
 # Manufacturer / preset color maps (Bare Knuckle + generic 4-conductor fallback)
@@ -31,6 +32,31 @@ WIRING_PRESETS = {
     'Screw Coil Only': {'HOT': ['south_start'], 'SERIES_LINK': [], 'GROUND': ['south_finish']}
 }
 
+# Colour name -> hex for the small SVG preview (unknown colours fall back to grey)
+COLOR_HEX = {
+    'Red': '#d62728',
+    'White': '#ffffff',
+    'Green': '#2ca02c',
+    'Black': '#111111',
+    'Yellow': '#ffbf00',
+    'Bare': '#888888'
+}
+
+# Fills light enough to need dark text on top
+LIGHT_TEXT_FILLS = frozenset({'#ffffff', '#ffbf00'})
+
+# Element templates for simple_humbucker_svg; only positions, fills and text vary per element
+_DOT_TMPL = '<circle cx="{cx}" cy="{cy}" r="12" fill="{fill}" stroke="#222" stroke-width=1 />'
+_DOT_INITIAL_TMPL = (
+    '<text x="{cx}" y="{cy}" text-anchor="middle" dominant-baseline="middle" font-size=11 '
+    'font-family="sans-serif" fill="{fill}">{initial}</text>'
+)
+_DOT_NAME_TMPL = '<text x="{cx}" y="{y}" text-anchor="middle" font-size=11 font-family="sans-serif">{name}</text>'
+_ROLE_TMPL = (
+    '<text x="{x}" y="{y}" text-anchor="middle" font-size=11 font-family="sans-serif" '
+    'fill="#ff7f0e">{role}</text>'
+)
+
 
 def _probe_is_normal(choice: Optional[str]) -> bool:
     """Return True when the probe/tap result indicates NORMAL phase.
@@ -82,8 +108,24 @@ def infer_start_finish_from_probes(pair_colors: List[str], red_wire: Optional[st
     - If no matching probe-wire information is available, fall back to `choose_pair_roles()` which
       uses the pair ordering and the probe choice.
 
-    This function preserves the `swap` manual override.
+    This function preserves the `swap` manual override. Results are memoised on the (hashable)
+    arguments; each call gets its own copy of the result dict.
     """
+    try:
+        return dict(_infer_start_finish_cached(tuple(pair_colors or ()), red_wire, black_wire, probe_choice, swap))
+    except TypeError:
+        # unhashable argument (e.g. a list from an old session backup) - compute directly
+        return _infer_start_finish(pair_colors, red_wire, black_wire, probe_choice, swap)
+
+
+@lru_cache(maxsize=256)
+def _infer_start_finish_cached(pair_colors: tuple, red_wire: Optional[str], black_wire: Optional[str],
+                               probe_choice: Optional[str], swap: bool) -> Dict[str, Optional[str]]:
+    return _infer_start_finish(pair_colors, red_wire, black_wire, probe_choice, swap)
+
+
+def _infer_start_finish(pair_colors, red_wire: Optional[str], black_wire: Optional[str],
+                        probe_choice: Optional[str], swap: bool = False) -> Dict[str, Optional[str]]:
     if not pair_colors or len(pair_colors) < 2:
         return {'start': None, 'finish': None}
 
@@ -230,33 +272,23 @@ def simple_humbucker_svg(colors: List[str], roles: Dict[str, List[int]] = None,
     `roles` is a dict mapping role name -> list of indices in colors to label (e.g. {'HOT':[0], 'SERIES':[1,2]})
     Returns an HTML string (SVG) suitable for `components.html`.
     """
-    # color name -> hex fallback
-    COLOR_HEX = {
-        'Red': '#d62728',
-        'White': '#ffffff',
-        'Green': '#2ca02c',
-        'Black': '#111111',
-        'Yellow': '#ffbf00',
-        'Bare': '#888888'
-    }
     w = 320
     h = 80
     dot_x_start = 60
     spacing = 50
-    svg_parts = [f"<svg width=\"{w}\" height=\"{h}\" viewBox=\"0 0 {w} {h}\" xmlns=\"http://www.w3.org/2000/svg\">"]
-    svg_parts.append(f"<text x=\"12\" y=\"18\" font-family=\"sans-serif\" font-size=14>{title}</text>")
+    svg_parts = [f'<svg width="{w}" height="{h}" viewBox="0 0 {w} {h}" xmlns="http://www.w3.org/2000/svg">']
+    svg_parts.append(f'<text x="12" y="18" font-family="sans-serif" font-size=14>{title}</text>')
     for i in range(min(4, len(colors))):
         cx = dot_x_start + i * spacing
         cy = 44
         col = COLOR_HEX.get(colors[i], '#cccccc')
-        svg_parts.append(f"<circle cx=\"{cx}\" cy=\"{cy}\" r=\"12\" fill=\"{col}\" stroke=\"#222\" stroke-width=1 />")
+        svg_parts.append(_DOT_TMPL.format(cx=cx, cy=cy, fill=col))
         # Draw a contrasting initial inside the colored ball (white for most colors)
         initial = (colors[i][0] if colors[i] else '?').upper()
         # Choose black text for very light fills
-        light_text_colors = {'#ffffff', '#ffbf00'}
-        text_fill = '#ffffff' if col.lower() not in light_text_colors else '#111111'
-        svg_parts.append(f"<text x=\"{cx}\" y=\"{cy}\" text-anchor=\"middle\" dominant-baseline=\"middle\" font-size=11 font-family=\"sans-serif\" fill=\"{text_fill}\">{initial}</text>")
-        svg_parts.append(f"<text x=\"{cx}\" y=\"{cy+28}\" text-anchor=\"middle\" font-size=11 font-family=\"sans-serif\">{colors[i]}</text>")
+        text_fill = '#111111' if col in LIGHT_TEXT_FILLS else '#ffffff'
+        svg_parts.append(_DOT_INITIAL_TMPL.format(cx=cx, cy=cy, fill=text_fill, initial=initial))
+        svg_parts.append(_DOT_NAME_TMPL.format(cx=cx, y=cy + 28, name=colors[i]))
 
     # role labels
     if roles:
@@ -265,7 +297,7 @@ def simple_humbucker_svg(colors: List[str], roles: Dict[str, List[int]] = None,
             for idx in idxs:
                 if 0 <= idx < len(colors):
                     lx = dot_x_start + idx * spacing
-                    svg_parts.append(f"<text x=\"{lx}\" y=\"{label_y}\" text-anchor=\"middle\" font-size=11 font-family=\"sans-serif\" fill=\"#ff7f0e\">{role}</text>")
+                    svg_parts.append(_ROLE_TMPL.format(x=lx, y=label_y, role=role))
 
     svg_parts.append('</svg>')
     return '\n'.join(svg_parts)
@@ -0,0 +1,41 @@
+"""Step 6 combined wiring summary for the inter-pickup connection modes."""
+import json
+import os
+
+import pytest
+
+pytest.importorskip('streamlit')
+from streamlit.testing.v1 import AppTest
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app')
+
+
+def test_parallel_pickups_joined_in_series(tmp_path, monkeypatch):
+    # Parallel coil wiring leaves both pickups without an internal series link, which used to
+    # turn the whole series 'steps' dict into None and crash the summary.
+    (tmp_path / 'app').mkdir()
+    (tmp_path / 'app' / 'session_backup.json').write_text(json.dumps({
+        'step': 6,
+        'neck_wire_colors': ['Red', 'White', 'Green', 'Black'],
+        'bridge_wire_colors': ['Red', 'White', 'Green', 'Black'],
+        'neck_north_colors': ['Red', 'White'],
+        'neck_south_colors': ['Green', 'Black'],
+        'bridge_north_colors': ['Red', 'White'],
+        'bridge_south_colors': ['Green', 'Black'],
+        'n_up': 4.1, 'n_lo': 4.0, 'b_up': 4.3, 'b_lo': 4.2,
+    }), encoding='utf-8')
+    # BACKUP_PATH is relative to the working directory; keep the real backup out of the test
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(APP_DIR)
+
+    at = AppTest.from_file(os.path.join(APP_DIR, 'main.py'), default_timeout=30)
+    at.run()
+    next(b for b in at.button if b.label == 'Analyze wiring').click().run()
+    at.selectbox(key='neck_wiring_choice').set_value('parallel').run()
+    at.selectbox(key='bridge_wiring_choice').set_value('parallel').run()
+    at.selectbox(key='pickups_connection').set_value('series').run()
+
+    assert not at.exception
+    assert not [e.value for e in at.error if 'wiring order' in e.value]
+    assert any('**Combined Mode:** SERIES' in m.value for m in at.markdown)
+    assert any(b.label == 'Restart' for b in at.button)
@@ -0,0 +1,56 @@
+"""Restoring a session backup written by an older version of the app."""
+import json
+import os
+
+import pytest
+
+pytest.importorskip('streamlit')
+from streamlit.testing.v1 import AppTest
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app')
+
+
+def test_restored_three_colour_coil_is_trimmed_to_two(tmp_path, monkeypatch):
+    # Backups saved before the coil pickers were capped at two colours can hold three or more;
+    # Step 5's multiselects (max_selections=2) must still render.
+    (tmp_path / 'app').mkdir()
+    (tmp_path / 'app' / 'session_backup.json').write_text(json.dumps({
+        'step': 5,
+        'neck_wire_colors': ['Red', 'White', 'Green', 'Black'],
+        'bridge_wire_colors': ['Red', 'White', 'Green', 'Black'],
+        'neck_north_colors': ['Red', 'White', 'Green'],
+        'neck_south_colors': ['Black'],
+        'bridge_north_colors': ['Red', 'White'],
+        'bridge_south_colors': ['Green', 'Black', 'White'],
+    }), encoding='utf-8')
+    # BACKUP_PATH is relative to the working directory; keep the real backup out of the test
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(APP_DIR)
+
+    at = AppTest.from_file(os.path.join(APP_DIR, 'main.py'), default_timeout=30)
+    at.run()
+
+    assert not at.exception
+    assert at.session_state['neck_north_colors'] == ['Red', 'White']
+    assert at.session_state['bridge_south_colors'] == ['Green', 'Black']
+    assert at.session_state['neck_south_colors'] == ['Black']
+
+
+def test_stale_ai_status_is_not_restored(tmp_path, monkeypatch):
+    # '_ai_status' carries a time.monotonic() stamp from the process that wrote the backup
+    (tmp_path / 'app').mkdir()
+    (tmp_path / 'app' / 'session_backup.json').write_text(json.dumps({
+        'step': 1,
+        '_ai_status': [{'ok': True}, 1e12],
+    }), encoding='utf-8')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(APP_DIR)
+
+    at = AppTest.from_file(os.path.join(APP_DIR, 'main.py'), default_timeout=30)
+    at.run()
+
+    assert not at.exception
+    status = at.session_state['_ai_status']
+    assert status[1] != 1e12
+    saved = json.loads((tmp_path / 'app' / 'session_backup.json').read_text(encoding='utf-8'))
+    assert '_ai_status' not in saved